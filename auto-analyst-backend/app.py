@@ -94,7 +94,7 @@ from src.schemas.query_schema import QueryRequest
 
 from src.utils.logger import Logger
 
-from src.routes.session_routes import apply_model_safeguards
+from src.routes.session_routes import apply_model_safeguards, MAX_UPLOAD_BYTES
 
 
 # Import deep analysis components directly
@@ -497,6 +497,28 @@ async def verify_origin_middleware(request: Request, call_next):
 
 
 
+# Reject oversized uploads up front: multipart bodies are spooled before any route handler runs
+
+@app.middleware("http")
+
+async def limit_upload_size_middleware(request: Request, call_next):
+
+    content_length = request.headers.get("content-length")
+
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+
+        return JSONResponse(
+
+            status_code=413,
+
+            content={"detail": f"File too large. Maximum upload size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"}
+
+        )
+
+    return await call_next(request)
+
+
+
 # CORS middleware (still needed for browser preflight)
 
 app.add_middleware(
@@ -580,9 +602,8 @@ async def chat_with_agent(
 
         # Log the dataset being used for analysis with detailed information
         datasets = session_state["datasets"]
-        dataset_names = list(datasets.keys())
-        if dataset_names:
-            current_dataset_name = dataset_names[-1]  # Get the last (most recent) dataset
+        current_dataset_name = next(reversed(datasets), None)  # Get the last (most recent) dataset without copying the keys
+        if current_dataset_name is not None:
             dataset_shape = datasets[current_dataset_name].shape
             
             # Check if this is the default dataset and explain why
@@ -24,7 +24,7 @@ def get_tier_1():
     tier_1 = []
     for provider, models in MODEL_COSTS.items():
         for model, cost in models.items():
-            if cost["input"] + cost["output"] < TIERS_COST["tier1"]:
+            if cost.input + cost.output < TIERS_COST["tier1"]:
                 tier_1.append(model)
     return tier_1
 
@@ -32,7 +32,7 @@ def get_tier_2():
     tier_2 = []
     for provider, models in MODEL_COSTS.items():
         for model, cost in models.items():
-            if cost["input"] + cost["output"] >= TIERS_COST["tier1"] and cost["input"] + cost["output"] < TIERS_COST["tier2"]:
+            if cost.input + cost.output >= TIERS_COST["tier1"] and cost.input + cost.output < TIERS_COST["tier2"]:
                 tier_2.append(model)
     return tier_2
 
@@ -40,7 +40,7 @@ def get_tier_3():
     tier_3 = []
     for provider, models in MODEL_COSTS.items():
         for model, cost in models.items():
-            if cost["input"] + cost["output"] >= TIERS_COST["tier2"] and cost["input"] + cost["output"] < TIERS_COST["tier3"]:
+            if cost.input + cost.output >= TIERS_COST["tier2"] and cost.input + cost.output < TIERS_COST["tier3"]:
                 tier_3.append(model)
     return tier_3  
 
@@ -48,7 +48,7 @@ def get_tier_4():
     tier_4 = []
     for provider, models in MODEL_COSTS.items():
         for model, cost in models.items():
-            if cost["input"] + cost["output"] >= TIERS_COST["tier3"]:
+            if cost.input + cost.output >= TIERS_COST["tier3"]:
                 tier_4.append(model)
     return tier_4
 
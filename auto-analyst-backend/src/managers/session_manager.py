@@ -3,6 +3,7 @@ import os
 import time
 import uuid
 import logging
+import threading
 import pandas as pd
 from typing import Dict, Any, List
 
@@ -45,6 +46,10 @@ class SessionManager:
         """
         self.styling_instructions = styling_instructions
         self._sessions = {}
+        # Guards _sessions and _make_data: upload handlers update sessions from threadpool workers while
+        # other requests read and create them on the event loop. Slow work (retrievers, AI systems,
+        # descriptions) stays outside it
+        self._lock = threading.RLock()
         self._default_df = None
         self._default_retrievers = None
         self._default_ai_system = None
@@ -143,52 +148,55 @@ This dataset appears clean with consistent formatting and no missing values, mak
                 "max_tokens": int(os.getenv("MAX_TOKENS", 6000))
             }
         
-        if session_id not in self._sessions:
-            # Check if we need to create a brand new session
-            logger.log_message(f"Creating new session state for session_id: {session_id}", level=logging.INFO)
+        with self._lock:
+            if session_id not in self._sessions:
+                # Check if we need to create a brand new session
+                logger.log_message(f"Creating new session state for session_id: {session_id}", level=logging.INFO)
             
-            # Initialize DuckDB connection for this session
+                # Initialize DuckDB connection for this session
 
             
-            # Initialize with default state
-            self._sessions[session_id] = {
-                "datasets": {"df":self._default_df.copy() if self._default_df is not None else None},
-                "dataset_names": ["df"],
-                "retrievers": self._default_retrievers,
-                "ai_system": self._default_ai_system,
-                "make_data": self._make_data,
-                "description": self._dataset_description,
-                "name": self._default_name,
-                "model_config": default_model_config,
-                "creation_time": time.time(),
-                "duckdb_conn": None,
-            }
-        else:
-            # Verify dataset integrity in existing session
-            session = self._sessions[session_id]
-            
-            # Always update model_config to match global settings
-            session["model_config"] = default_model_config
-            
-            # If dataset is somehow missing, restore it
-            if "datasets" not in session or session["datasets"] is None:
-                logger.log_message(f"Restoring missing dataset for session {session_id}", level=logging.WARNING)
-                session["datasets"] = {"df":self._default_df.copy() if self._default_df is not None else None}
-                session["retrievers"] = self._default_retrievers
-                session["ai_system"] = self._default_ai_system
-                session["description"] = self._dataset_description
-                session["name"] = self._default_name
-            
-            # Ensure we have the basic required fields
-            if "name" not in session:
-                session["name"] = self._default_name
-            if "description" not in session:
-                session["description"] = self._dataset_description
-            
-            # Update last accessed time
-            session["last_accessed"] = time.time()
-            
-        return self._sessions[session_id]
+                # Initialize with default state
+                self._sessions[session_id] = {
+                    "datasets": {"df":self._default_df.copy() if self._default_df is not None else None},
+                    "dataset_names": ["df"],
+                    "retrievers": self._default_retrievers,
+                    "ai_system": self._default_ai_system,
+                    "make_data": self._make_data,
+                    "description": self._dataset_description,
+                    "name": self._default_name,
+                    "model_config": default_model_config,
+                    "creation_time": time.time(),
+                    "duckdb_conn": None,
+                    "is_custom_dataset": False,
+                }
+            else:
+                # Verify dataset integrity in existing session
+                session = self._sessions[session_id]
+            
+                # Always update model_config to match global settings
+                session["model_config"] = default_model_config
+            
+                # If dataset is somehow missing, restore it
+                if "datasets" not in session or session["datasets"] is None:
+                    logger.log_message(f"Restoring missing dataset for session {session_id}", level=logging.WARNING)
+                    session["datasets"] = {"df":self._default_df.copy() if self._default_df is not None else None}
+                    session["retrievers"] = self._default_retrievers
+                    session["ai_system"] = self._default_ai_system
+                    session["description"] = self._dataset_description
+                    session["name"] = self._default_name
+                    session["is_custom_dataset"] = False
+            
+                # Ensure we have the basic required fields
+                if "name" not in session:
+                    session["name"] = self._default_name
+                if "description" not in session:
+                    session["description"] = self._dataset_description
+            
+                # Update last accessed time
+                session["last_accessed"] = time.time()
+            
+            return self._sessions[session_id]
 
    
 
@@ -224,13 +232,14 @@ This dataset appears clean with consistent formatting and no missing values, mak
             
             # Initialize retrievers and AI system BEFORE creating session_state
             # Update make_data with the description
-            self._make_data = {'description': desc}
-            retrievers = self.initialize_retrievers(self.styling_instructions, [str(self._make_data)])
+            session_make_data = {'description': desc}
+            retrievers = self.initialize_retrievers(self.styling_instructions, [str(session_make_data)])
             
             # Check if session has a user_id to create user-specific AI system
             current_user_id = None
-            if session_id in self._sessions and "user_id" in self._sessions[session_id]:
-                current_user_id = self._sessions[session_id]["user_id"]
+            with self._lock:
+                if session_id in self._sessions and "user_id" in self._sessions[session_id]:
+                    current_user_id = self._sessions[session_id]["user_id"]
             
             ai_system = self.create_ai_system_for_user(retrievers, current_user_id)
             
@@ -240,24 +249,27 @@ This dataset appears clean with consistent formatting and no missing values, mak
                 "dataset_names": names,
                 "retrievers": retrievers,  # Now retrievers is defined
                 "ai_system": ai_system,    # Now ai_system is defined
-                "make_data": self._make_data,
+                "make_data": session_make_data,
                 "description": desc,
                 "name": names[0],
                 "duckdb_conn": None,
                 "model_config": default_model_config,
+                "is_custom_dataset": True,
             }
             
-            # Preserve user_id, chat_id, and model_config if they exist in the current session
-            if session_id in self._sessions:
-                if "user_id" in self._sessions[session_id]:
-                    session_state["user_id"] = self._sessions[session_id]["user_id"]
-                if "chat_id" in self._sessions[session_id]:
-                    session_state["chat_id"] = self._sessions[session_id]["chat_id"]
-                if "model_config" in self._sessions[session_id]:
-                    session_state["model_config"] = self._sessions[session_id]["model_config"]
-            
-            # Replace the entire session with the new state
-            self._sessions[session_id] = session_state
+            with self._lock:
+                # Preserve user_id, chat_id, and model_config if they exist in the current session
+                if session_id in self._sessions:
+                    if "user_id" in self._sessions[session_id]:
+                        session_state["user_id"] = self._sessions[session_id]["user_id"]
+                    if "chat_id" in self._sessions[session_id]:
+                        session_state["chat_id"] = self._sessions[session_id]["chat_id"]
+                    if "model_config" in self._sessions[session_id]:
+                        session_state["model_config"] = self._sessions[session_id]["model_config"]
+                
+                # Replace the entire session with the new state
+                self._make_data = session_make_data
+                self._sessions[session_id] = session_state
             
             logger.log_message(f"Updated session {session_id} with completely fresh dataset state: {str(names)}", level=logging.INFO)
         except Exception as e:
@@ -281,25 +293,27 @@ This dataset appears clean with consistent formatting and no missing values, mak
                 "max_tokens": int(os.getenv("MAX_TOKENS", 6000))
             }
             
-            # Clear any custom data associated with the session first
-            if session_id in self._sessions:
-                del self._sessions[session_id]
-                logger.log_message(f"Cleared existing state for session {session_id} before reset.", level=logging.INFO)
+            with self._lock:
+                # Clear any custom data associated with the session first
+                if session_id in self._sessions:
+                    del self._sessions[session_id]
+                    logger.log_message(f"Cleared existing state for session {session_id} before reset.", level=logging.INFO)
 
-            # Create new DuckDB connection for default session
+                # Create new DuckDB connection for default session
 
-            # Initialize with default state
-            self._sessions[session_id] = {
-                "datasets": {'df':self._default_df.copy()},
-                "dataset_names": ["df"], # Use a copy
-                "retrievers": self._default_retrievers,
-                "ai_system": self._default_ai_system,
-                "description": self._dataset_description,
-                "name": self._default_name, # Explicitly set the default name
-                "make_data": None, # Clear any custom make_data
-                "model_config": default_model_config, # Initialize with default model config
-                "duckdb_conn": None, # Create new DuckDB connection
-            }
+                # Initialize with default state
+                self._sessions[session_id] = {
+                    "datasets": {'df':self._default_df.copy()},
+                    "dataset_names": ["df"], # Use a copy
+                    "retrievers": self._default_retrievers,
+                    "ai_system": self._default_ai_system,
+                    "description": self._dataset_description,
+                    "name": self._default_name, # Explicitly set the default name
+                    "make_data": None, # Clear any custom make_data
+                    "model_config": default_model_config, # Initialize with default model config
+                    "duckdb_conn": None, # Create new DuckDB connection
+                    "is_custom_dataset": False,
+                }
             logger.log_message(f"Reset session {session_id} to default dataset: {self._default_name}", level=logging.INFO)
         except Exception as e:
             logger.log_message(f"Error resetting session {session_id}: {str(e)}", level=logging.ERROR)
@@ -382,16 +396,17 @@ This dataset appears clean with consistent formatting and no missing values, mak
                 "max_tokens": getattr(model_object, 'kwargs', {}).get('max_tokens', 4000)
             }
             
-            # Ensure we have a session state for this session ID
-            if session_id not in self._sessions:
-                self.get_session_state(session_id)
-            
-            # Set the default model configuration in session state
-            self._sessions[session_id]["model_config"] = default_model_config
-            
-            # Also update the app-level model config if available
-            if hasattr(self, '_app_model_config'):
-                self._app_model_config.update(default_model_config)
+            with self._lock:
+                # Ensure we have a session state for this session ID
+                if session_id not in self._sessions:
+                    self.get_session_state(session_id)
+                
+                # Set the default model configuration in session state
+                self._sessions[session_id]["model_config"] = default_model_config
+                
+                # Also update the app-level model config if available
+                if hasattr(self, '_app_model_config'):
+                    self._app_model_config.update(default_model_config)
             
             logger.log_message(f"Set default LM '{default_model_name}' for session {session_id} (user: {user_id})", level=logging.INFO)
             
@@ -427,36 +442,39 @@ This dataset appears clean with consistent formatting and no missing values, mak
         Returns:
             Updated session state dictionary
         """
-        # Ensure we have a session state for this session ID
-        if session_id not in self._sessions:
-            self.get_session_state(session_id)  # Initialize with defaults
-        
-        # Store user ID
-        self._sessions[session_id]["user_id"] = user_id
+        with self._lock:
+            # Ensure we have a session state for this session ID
+            if session_id not in self._sessions:
+                self.get_session_state(session_id)  # Initialize with defaults
+            
+            # Store user ID
+            self._sessions[session_id]["user_id"] = user_id
         
         # Set default LM for user upon signin
         self.set_default_lm_for_user(session_id, user_id)
         
-        # Generate or use chat ID
-        if chat_id:
-            chat_id_to_use = chat_id
-        else:
-            # Check if chat_id already exists
-            if "chat_id" not in self._sessions[session_id] or not self._sessions[session_id]["chat_id"]:
-                # Use current timestamp + random number to generate a more readable ID
-                import random
-                chat_id_to_use = int(time.time() * 1000) % 1000000 + random.randint(1, 999)
+        with self._lock:
+            # Generate or use chat ID
+            if chat_id:
+                chat_id_to_use = chat_id
             else:
-                chat_id_to_use = self._sessions[session_id]["chat_id"]
-        
-        # Store chat ID
-        self._sessions[session_id]["chat_id"] = chat_id_to_use
+                # Check if chat_id already exists
+                if "chat_id" not in self._sessions[session_id] or not self._sessions[session_id]["chat_id"]:
+                    # Use current timestamp + random number to generate a more readable ID
+                    import random
+                    chat_id_to_use = int(time.time() * 1000) % 1000000 + random.randint(1, 999)
+                else:
+                    chat_id_to_use = self._sessions[session_id]["chat_id"]
+            
+            # Store chat ID
+            self._sessions[session_id]["chat_id"] = chat_id_to_use
+            session_retrievers = self._sessions[session_id].get("retrievers")
         
         # Recreate AI system with user context to load custom agents
         try:
-            session_retrievers = self._sessions[session_id]["retrievers"]
             user_ai_system = self.create_ai_system_for_user(session_retrievers, user_id)
-            self._sessions[session_id]["ai_system"] = user_ai_system
+            with self._lock:
+                self._sessions[session_id]["ai_system"] = user_ai_system
             logger.log_message(f"Updated AI system for session {session_id} with user {user_id}", level=logging.INFO)
         except Exception as e:
             logger.log_message(f"Error updating AI system for user {user_id}: {str(e)}", level=logging.ERROR)
@@ -1,29 +1,34 @@
+import codecs
+import csv
+import functools
+import hashlib
 import io
 import logging
 import json
 import re
 import os
-from io import StringIO
-from typing import Optional, List, Dict
-import random
+import tempfile
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple, Union
 import pandas as pd
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
 from fastapi.security import APIKeyHeader
+from starlette.concurrency import run_in_threadpool
 
 import numpy as np
+import orjson
 from src.managers.session_manager import get_session_id
 from src.schemas.model_settings_schema import ModelSettings
-from src.utils.logger import Logger
+from src.utils.logger import get_logger
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
-# data context is for excelsheets with multiple sheets and dataset_descrp is for single sheet or csv
-from src.agents.agents import data_context_gen, dataset_description_agent
-from src.utils.model_registry import MODEL_OBJECTS, mid_lm
-from src.utils.dataset_description_generator import generate_dataset_description
-import dspy
-import re
+from fastapi.responses import ORJSONResponse, Response
 # from fastapi.responses import JSONResponse
 import time
+import uuid
 
 # Try to import chardet, but make it optional
 try:
@@ -31,55 +36,87 @@ try:
     HAS_CHARDET = True
 except ImportError:
     HAS_CHARDET = False
-    logger_temp = Logger("session_routes", see_time=False, console_log=False)
+    logger_temp = get_logger("session_routes")
     logger_temp.log_message("chardet not installed, encoding detection will be limited", level=logging.WARNING)
 
-logger = Logger("session_routes", see_time=False, console_log=False)
+# charset-normalizer ships with requests; prefer it for one-shot detection when present
+try:
+    import charset_normalizer
+    HAS_CHARSET_NORMALIZER = True
+except ImportError:
+    HAS_CHARSET_NORMALIZER = False
+
+# polars (already used for analysis) gives a faster reader for the CSV preview when available
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
+
+# pyarrow's multithreaded CSV reader is used for full CSV uploads when installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# python-calamine lets pandas parse workbooks in Rust; without it pandas picks openpyxl/xlrd
+try:
+    from python_calamine import CalamineWorkbook
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+EXCEL_ENGINE = "calamine" if HAS_CALAMINE else None
+
+logger = get_logger("session_routes")
+
+# The CSV preview returns PREVIEW_ROWS rows; a few extra are parsed so dropping blank rows still fills it
+PREVIEW_ROWS = 10
+PREVIEW_PARSE_ROWS = 50
+# The preview only reads the start of the upload, up to MAX_PREVIEW_BYTES
+MAX_PREVIEW_BYTES = 2 * 1024 * 1024
+PREVIEW_CHUNK_SIZE = 64 * 1024
+
+# Upper bound on uploaded file size; larger uploads are rejected with 413 before they fill memory
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+# Per-provider (model substrings, forced temperature or None, max_tokens cap) from official API limits.
+# First match wins; an empty substring tuple matches any model of that provider
+_MODEL_LIMITS = {
+    # O-series: temp MUST be 1.0; GPT-5 series; GPT-4 series
+    'openai': [(('o1', 'o3'), 1.0, 100_000), (('gpt-5',), 1.0, 16_000), (('gpt-4',), None, 4_096)],
+    # Anthropic: Sonnet 4/3.7/Opus 4 = 64K, others = 8K
+    'anthropic': [(('sonnet-4', 'sonnet-3-7', 'opus-4'), None, 64_000), ((), None, 8_192)],
+    # Groq: 32K
+    'groq': [((), None, 32_768)],
+    # Gemini: 2.5 series = 65K, others = 8K
+    'gemini': [(('2.5', '2-5'), None, 65_535), ((), None, 8_192)],
+}
+_DEFAULT_MAX_TOKENS = 4_096
 
 
 def apply_model_safeguards(model_name: str, provider: str, temperature: float, max_tokens: int) -> dict:
     """Apply model-specific safeguards for temperature and max_tokens based on official API limits"""
     model_str = str(model_name).lower()
-    provider_str = str(provider).lower()
-    
-    safe_temp = min(1.0, max(0.0, float(temperature)))
-    safe_max_tokens = max_tokens
     
-    # O-series: temp MUST be 1.0
-    if ('o1' in model_str or 'o3' in model_str) and provider_str == 'openai':
-        safe_temp = 1.0
-        safe_max_tokens = min(max_tokens, 100_000)
-    # GPT-5 series
-    elif 'gpt-5' in model_str and provider_str == 'openai':
-        safe_temp = 1.0
-        safe_max_tokens = min(max_tokens, 16_000)
-    # GPT-4 series
-    elif 'gpt-4' in model_str and provider_str == 'openai':
-        safe_max_tokens = min(max_tokens, 4_096)
-    # Anthropic: Sonnet 4/3.7/Opus 4 = 64K, others = 8K
-    elif provider_str == 'anthropic':
-        if any(x in model_str for x in ['sonnet-4', 'sonnet-3-7', 'opus-4']):
-            safe_max_tokens = min(max_tokens, 64_000)
-        else:
-            safe_max_tokens = min(max_tokens, 8_192)
-    # Groq: 32K
-    elif provider_str == 'groq':
-        safe_max_tokens = min(max_tokens, 32_768)
-    # Gemini: 2.5 series = 65K, others = 8K
-    elif provider_str == 'gemini':
-        if '2.5' in model_str or '2-5' in model_str:
-            safe_max_tokens = min(max_tokens, 65_535)
-        else:
-            safe_max_tokens = min(max_tokens, 8_192)
+    for substrings, forced_temp, token_cap in _MODEL_LIMITS.get(str(provider).lower(), ()):
+        if not substrings or any(x in model_str for x in substrings):
+            break
     else:
-        safe_max_tokens = min(max_tokens, 4_096)
+        forced_temp, token_cap = None, _DEFAULT_MAX_TOKENS
     
-    return {"temperature": safe_temp, "max_tokens": safe_max_tokens}
+    safe_temp = forced_temp if forced_temp is not None else min(1.0, max(0.0, float(temperature)))
+    return {"temperature": safe_temp, "max_tokens": min(max_tokens, token_cap)}
 
 # Add session header for dependency
 X_SESSION_ID = APIKeyHeader(name="X-Session-ID", auto_error=False)
 
-router = APIRouter(tags=["session"])
+# orjson serializes every JSON response in this module (NaN/Inf become null, numpy values are handled natively)
+router = APIRouter(tags=["session"], default_response_class=ORJSONResponse)
 
 # Dependency to get app state
 def get_app_state(request: Request):
@@ -113,22 +150,105 @@ class InitializeSessionRequest(BaseModel):
     user_email: str
     user_name: str
 
+def _upload_too_large(max_bytes: int = MAX_UPLOAD_BYTES) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large. Maximum upload size is {max_bytes // (1024 * 1024)} MB")
+
+
+def _spool_to_tmp(src, suffix: str = "", max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """Copy an upload's file object to a named temp file in 1 MiB chunks and return its path"""
+    copied = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                copied += len(chunk)
+                if copied > max_bytes:
+                    raise _upload_too_large(max_bytes)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name
+
+
+async def spooled_upload_path(request: Request, file: UploadFile = File(...)):
+    """
+    Dependency yielding a temp-file path holding the uploaded file, so pandas can read it from disk
+    instead of an in-memory copy. The copy runs in the threadpool, uploads over MAX_UPLOAD_BYTES
+    are rejected with 413, and the temp file is removed when the request finishes.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise _upload_too_large()
+
+    suffix = os.path.splitext(file.filename or "")[1]
+    path = await run_in_threadpool(_spool_to_tmp, file.file, suffix)
+    try:
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_xlsx_sheet_names(path: str) -> Optional[List[str]]:
+    """
+    Read sheet names of an .xlsx/.xlsm workbook from xl/workbook.xml only, without decompressing sheet data.
+    Returns None when the file is not an OOXML archive (e.g. legacy .xls) or no sheets are listed,
+    so the caller falls back to a workbook reader.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            root = ET.fromstring(archive.read("xl/workbook.xml"))
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        return None
+    # Match on the local name: transitional and Strict OOXML use different SpreadsheetML namespaces
+    sheet_names = [el.get("name") for el in root.iter() if el.tag.rsplit("}", 1)[-1] == "sheet"]
+    return sheet_names or None
+
+
+def read_sheet_names(path: str) -> List[str]:
+    """List a workbook's sheet names, reading only the workbook index when possible"""
+    sheet_names = read_xlsx_sheet_names(path)
+    if sheet_names is not None:
+        return sheet_names
+    # Not an OOXML archive (e.g. legacy .xls), so let a workbook reader list the sheets
+    if HAS_CALAMINE:
+        return CalamineWorkbook.from_path(path).sheet_names
+    with pd.ExcelFile(path) as excel_file:
+        return excel_file.sheet_names
+
+
+# Upper bound on threads parsing sheets of one workbook
+EXCEL_PARSE_WORKERS = 8
+
+
+def clean_excel_sheet(sheet_df: pd.DataFrame) -> pd.DataFrame:
+    """Null out NaN/Inf, drop empty rows and columns and strip column names of a parsed sheet"""
+    sheet_df.replace({np.nan: None, np.inf: None, -np.inf: None}, inplace=True)
+    
+    # Drop empty rows and columns (one notna pass, as a plain ndarray, feeds both masks)
+    notna = sheet_df.notna().to_numpy()
+    sheet_df = sheet_df.iloc[notna.any(axis=1), notna.any(axis=0)]
+    
+    # Clean column names (non-string headers, e.g. numeric ones, are kept as-is)
+    sheet_df.columns = [c.strip() if isinstance(c, str) else c for c in sheet_df.columns]
+    return sheet_df
+
+
 @router.post("/api/excel-sheets")
 async def get_excel_sheets(
     file: UploadFile = File(...),
+    path: str = Depends(spooled_upload_path),
     app_state = Depends(get_app_state),
     session_id: str = Depends(get_session_id_dependency)
 ):
     """Get the list of sheet names from an Excel file"""
     try:
-        # Read the uploaded Excel file
-        contents = await file.read()
-        
-        # Load Excel file using pandas
-        excel_file = pd.ExcelFile(io.BytesIO(contents))
-        
-        # Get sheet names
-        sheet_names = excel_file.sheet_names
+        # Only the names are needed: read them from the workbook index without loading sheet data
+        # (file work runs in the threadpool so the event loop keeps serving other requests)
+        sheet_names = await run_in_threadpool(read_sheet_names, path)
         
         # Return the sheet names
         return {"sheets": sheet_names}
@@ -142,6 +262,7 @@ async def get_excel_sheets(
 @router.post("/upload_excel")
 async def upload_excel(
     file: UploadFile = File(...),
+    path: str = Depends(spooled_upload_path),
     name: str = Form(...),
     description: str = Form(...),
     selected_sheets: Optional[str] = Form(None),  # JSON array of strings
@@ -166,13 +287,10 @@ async def upload_excel(
             # Reset the session but don't completely wipe it, so we maintain user association
             app_state.reset_session_to_default(session_id)
         
-        # Read the uploaded Excel file
-        contents = await file.read()
-        
         try:
-            # Load Excel file to get all sheet names
-            excel_file = pd.ExcelFile(io.BytesIO(contents))
-            sheet_names = excel_file.sheet_names
+            # Sheet names come from the workbook index of the file spooled to disk by the dependency
+            # (file work runs in the threadpool so the event loop keeps serving other requests)
+            sheet_names = await run_in_threadpool(read_sheet_names, path)
             
             # Parse selected sheets if provided; else use all sheets
             target_sheets = sheet_names
@@ -180,47 +298,57 @@ async def upload_excel(
                 try:
                     sel = json.loads(selected_sheets)
                     if isinstance(sel, list):
+                        sel = set(sel)
                         target_sheets = [s for s in sheet_names if s in sel]
-                except Exception:
-                    pass
+                except (json.JSONDecodeError, TypeError) as e:
+                    logger.log_message(f"Ignoring invalid selected_sheets {selected_sheets!r}: {str(e)}", level=logging.WARNING)
 
             datasets = {}
             processed_sheets = []
             
-            for sheet_name in target_sheets:
+            # calamine opens sheets lazily, so sheets are parsed concurrently, each worker with its own handle;
+            # otherwise one ExcelFile is opened and shared by the serial parse
+            parallel = HAS_CALAMINE and len(target_sheets) > 1
+            excel_file = None if parallel else await run_in_threadpool(pd.ExcelFile, path, engine=EXCEL_ENGINE)
+            
+            def parse_sheet(sheet_name):
                 try:
-                    # Read each sheet
-                    sheet_df = pd.read_excel(io.BytesIO(contents), sheet_name=sheet_name)
-                    sheet_df.replace({np.nan: None, np.inf: None, -np.inf: None}, inplace=True)
-                    
-                    # Preprocessing steps
-                    # 1. Drop empty rows and columns
-                    sheet_df.dropna(how='all', inplace=True)
-                    sheet_df.dropna(how='all', axis=1, inplace=True)
-                    
-                    # 2. Clean column names
-                    sheet_df.columns = sheet_df.columns.str.strip()
-                    
-                    # 3. Skip empty sheets
-                    if sheet_df.empty:
-                        continue
-                    
-                    # Register each sheet in DuckDB with a clean table name
-                    clean_sheet_name = clean_dataset_name(sheet_name)
-                    datasets[clean_sheet_name] = sheet_df
-                    
-                    processed_sheets.append(clean_sheet_name)
-                        
+                    # Worker threads each open their own calamine workbook; a shared handle is not thread-safe
+                    sheet_df = pd.read_excel(path, sheet_name=sheet_name, engine=EXCEL_ENGINE) if parallel else excel_file.parse(sheet_name)
+                    return sheet_name, clean_excel_sheet(sheet_df)
                 except Exception as e:
                     logger.log_message(f"Error processing sheet '{sheet_name}': {str(e)}", level=logging.WARNING)
+                    return sheet_name, None
+            
+            def parse_sheets():
+                if parallel:
+                    with ThreadPoolExecutor(max_workers=min(EXCEL_PARSE_WORKERS, len(target_sheets))) as executor:
+                        return list(executor.map(parse_sheet, target_sheets))
+                return [parse_sheet(sheet_name) for sheet_name in target_sheets]
+            
+            try:
+                results = await run_in_threadpool(parse_sheets)
+            finally:
+                if excel_file is not None:
+                    excel_file.close()
+            
+            for sheet_name, sheet_df in results:
+                # Skip empty or unreadable sheets
+                if sheet_df is None or sheet_df.empty:
                     continue
+                
+                # Store each sheet under a clean table name (kept as pandas; agents execute against DataFrames)
+                clean_sheet_name = clean_dataset_name(sheet_name)
+                datasets[clean_sheet_name] = sheet_df
+                processed_sheets.append(clean_sheet_name)
             
             if not processed_sheets:
                 raise HTTPException(status_code=400, detail="No valid sheets found in Excel file")
             
-            # Update the session description (no primary dataset needed)
-            desc = description
-            app_state.update_session_dataset(session_id, datasets, processed_sheets, desc)
+            # Generate the session description without blocking the event loop (no primary dataset needed)
+            from src.utils.dataset_description_generator import agenerate_dataset_description
+            desc = await agenerate_dataset_description(datasets, description, processed_sheets)
+            await run_in_threadpool(app_state.update_session_dataset, session_id, datasets, processed_sheets, desc, pre_generated=True)
             
             logger.log_message(f"Processed Excel file with {len(processed_sheets)} sheets: {', '.join(processed_sheets)}", level=logging.INFO)
             
@@ -235,11 +363,232 @@ async def upload_excel(
             logger.log_message(f"Error processing Excel file: {str(e)}", level=logging.ERROR)
             raise HTTPException(status_code=400, detail=f"Error processing Excel file: {str(e)}")
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.log_message(f"Error in upload_excel: {str(e)}", level=logging.ERROR)
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Byte-order marks, longest first so the UTF-32 LE mark is not mistaken for UTF-16 LE
+_BOM_ENCODINGS = [
+    (b'\xff\xfe\x00\x00', 'utf-32'),
+    (b'\x00\x00\xfe\xff', 'utf-32'),
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe', 'utf-16'),
+    (b'\xfe\xff', 'utf-16'),
+]
+
+
+def sniff_encoding(content: bytes) -> str:
+    """Pick the codec for an upload: BOM first, then a UTF-8 check on the head, then charset detection"""
+    for bom, encoding in _BOM_ENCODINGS:
+        if content.startswith(bom):
+            return encoding
+    try:
+        # The first 16 KiB decides UTF-8; uploads are still decoded strictly and fall back if later bytes are invalid.
+        # Incremental decode so a multi-byte character cut off at the end of the head is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(content[:16384], final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    return detect_encoding(content) or 'latin-1'
+
+
+async def read_upload_prefix(file: UploadFile, max_bytes: int = MAX_PREVIEW_BYTES, max_lines: int = 2 * PREVIEW_PARSE_ROWS) -> Tuple[bytes, bool]:
+    """
+    Read the start of an upload in chunks until max_lines line breaks or max_bytes are buffered.
+    Returns the bytes read and whether the upload continues past them.
+    """
+    buf = bytearray()
+    lines = 0
+    while len(buf) < max_bytes and lines <= max_lines:
+        chunk = await file.read(min(PREVIEW_CHUNK_SIZE, max_bytes - len(buf)))
+        if not chunk:
+            return bytes(buf), False
+        buf.extend(chunk)
+        lines += chunk.count(b'\n')
+    return bytes(buf), bool(await file.read(1))
+
+
+def trim_partial_line(content: bytes, encoding: str) -> bytes:
+    """Drop the trailing, possibly cut-off row from a truncated upload prefix"""
+    if encoding.startswith(('utf-16', 'utf-32')):
+        byte_order = 'le' if content[:2] == b'\xff\xfe' else 'be'
+        newline = '\n'.encode(f"{encoding[:6]}-{byte_order}")
+    else:
+        newline = b'\n'
+    end = content.rfind(newline)
+    return content[:end + len(newline)] if end != -1 else content
+
+
+def read_csv_preview(content: bytes, encoding: str) -> Tuple[List[str], List[list]]:
+    """
+    Parse the first PREVIEW_PARSE_ROWS rows of a CSV upload into headers and raw rows, all values as strings.
+    UTF-8 input goes through polars' reader; other encodings, input polars rejects, or headers needing
+    pandas' duplicate/blank name mangling use read_csv_auto.
+    """
+    if HAS_POLARS and encoding in ('utf-8', 'utf-8-sig'):
+        try:
+            sample = content[:4096].decode('utf-8', errors='ignore')
+            delimiter = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+            df = pl.read_csv(
+                io.BytesIO(content), separator=delimiter, n_rows=PREVIEW_PARSE_ROWS,
+                infer_schema=False, encoding='utf8-lossy', truncate_ragged_lines=True
+            )
+            # Headers are sent back as the upload's columns, so duplicate or blank names must get pandas'
+            # mangling ('a.1', 'Unnamed: 1'); polars names them differently, so those files use pandas
+            if all(col and '_duplicated_' not in col for col in df.columns):
+                return df.columns, df.rows()
+        except Exception:
+            pass
+
+    # Type inference is skipped (dtype=str) since only the preview window is shown
+    new_df = read_csv_auto(
+        content, encoding, sample_size=4096,
+        nrows=PREVIEW_PARSE_ROWS, dtype=str, encoding_errors='replace'
+    )
+    return new_df.columns.tolist(), new_df.to_numpy(dtype=object, copy=False).tolist()
+
+
+# Charset detection results keyed by sha256 of the detection sample, so re-uploads of a file skip it
+_ENCODING_CACHE_SIZE = 128
+_encoding_cache: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+# sniff_encoding runs on threadpool workers and the event loop at once; every cache access holds this lock
+_encoding_cache_lock = threading.Lock()
+
+
+def detect_encoding(content: bytes) -> Optional[str]:
+    """Detect the text encoding of an upload from a bounded sample, or None if unknown"""
+    sample = content[:65536]
+    key = hashlib.sha256(sample).digest()
+    with _encoding_cache_lock:
+        if key in _encoding_cache:
+            _encoding_cache.move_to_end(key)
+            return _encoding_cache[key]
+
+    encoding = None
+    if HAS_CHARSET_NORMALIZER:
+        try:
+            best = charset_normalizer.from_bytes(sample).best()
+            if best is not None and best.encoding:
+                encoding = best.encoding
+        except Exception:
+            pass
+    if encoding is None and HAS_CHARDET:
+        try:
+            detected = chardet.detect(sample)
+            if detected and detected.get('encoding') and detected.get('confidence', 0) > 0.7:
+                encoding = detected['encoding']
+        except Exception:
+            pass
+
+    with _encoding_cache_lock:
+        _encoding_cache[key] = encoding
+        if len(_encoding_cache) > _ENCODING_CACHE_SIZE:
+            _encoding_cache.popitem(last=False)
+    return encoding
+
+
+CSV_DELIMITERS = [',', ';', '\t', '|', ':', ' ']
+
+
+def read_csv_auto(source: Union[bytes, str], encoding: str, columns: Optional[List[str]] = None, sample_size: int = 1024, **read_kwargs) -> pd.DataFrame:
+    """
+    Parse CSV from raw bytes or a file path with delimiter auto-detection.
+    pandas decodes the input in-stream (memory-mapping file paths), so no full-size Python str copy is made.
+    A UnicodeDecodeError is re-raised immediately so callers can move on to the next encoding.
+    """
+    is_path = isinstance(source, str)
+
+    def _read(sep, engine):
+        kwargs = {"low_memory": False, "memory_map": is_path} if engine == 'c' else {}
+        df = pd.read_csv(source if is_path else io.BytesIO(source), sep=sep, encoding=encoding, engine=engine, **kwargs, **read_kwargs)
+        return df[columns] if columns is not None else df
+
+    if is_path:
+        with open(source, 'rb') as f:
+            content = f.read(sample_size)
+    else:
+        content = source
+    sample = content[:sample_size].decode(encoding, errors='ignore')
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        return _read(dialect.delimiter, 'c')
+    except UnicodeDecodeError:
+        raise
+    except Exception:
+        pass
+
+    # Fallback to pandas automatic detection
+    try:
+        return _read(None, 'python')
+    except UnicodeDecodeError:
+        raise
+    except Exception as e:
+        last_exception = e
+
+    # Final fallback: brute-force common delimiters
+    for d in CSV_DELIMITERS:
+        try:
+            return _read(d, 'c')
+        except UnicodeDecodeError:
+            raise
+        except Exception as e:
+            last_exception = e
+    raise last_exception
+
+
+def read_csv_upload(path: str, encoding: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a full CSV upload (pyarrow first, pandas fallback) with NaN/Inf nulled out"""
+    new_df = read_csv_arrow(path, encoding, columns=columns) if HAS_PYARROW else None
+    if new_df is None:
+        # Strict decoding: a codec sniffed from the head can still be wrong further in, and the caller's
+        # fallback must see that error rather than have the bytes silently replaced
+        new_df = read_csv_auto(path, encoding, columns=columns)
+    new_df.replace({np.nan: None, np.inf: None, -np.inf: None}, inplace=True)
+    return new_df
+
+
+def read_csv_arrow(path: str, encoding: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Parse a CSV file with pyarrow's multithreaded block reader into a numpy-backed DataFrame.
+    Returns None when pyarrow cannot read it cleanly (no clear delimiter, ragged rows, undecodable text)
+    so the caller falls back to read_csv_auto.
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(4096).decode(encoding, errors='ignore')
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+        read_options = pv.ReadOptions(block_size=1 << 20, encoding=encoding)
+        parse_options = pv.ParseOptions(delimiter=delimiter)
+        convert_options = pv.ConvertOptions(include_columns=columns, strings_can_be_null=True)
+        # pyarrow parses ISO dates, times and timestamps into typed columns where pandas' reader keeps strings.
+        # Types are inferred from the first block, so opening a streaming reader (one block parsed) shows
+        # which columns to pin to string for the full read
+        with pv.open_csv(path, read_options=read_options, parse_options=parse_options, convert_options=convert_options) as reader:
+            convert_options.column_types = {
+                field.name: pa.string() for field in reader.schema if pa.types.is_temporal(field.type)
+            }
+        table = pv.read_csv(path, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    except Exception:
+        return None
+    # Columns with invalid UTF-8 come back as binary; pandas' reader replaces those bytes instead
+    if any(pa.types.is_binary(t) or pa.types.is_large_binary(t) for t in table.schema.types):
+        return None
+    # Plain numpy dtypes (not ArrowDtype) and string date columns match what read_csv_auto would return
+    return table.to_pandas()
+
+
+# Patterns used to turn dataset / file names into Python identifiers
+_SEPARATORS_RE = re.compile(r'[\s\-\.]+')
+_NON_IDENTIFIER_RE = re.compile(r'[^a-zA-Z0-9_]')
+_UNDERSCORES_RE = re.compile(r'_+')
+_CSV_SUFFIX_RE = re.compile(r'\.csv$', re.IGNORECASE)
+_FILENAME_TRANS = str.maketrans({' ': '_'})
+
+
+@functools.lru_cache(maxsize=1024)
 def clean_dataset_name(name: str) -> str:
     """
     Clean dataset name to be a safe Python identifier.
@@ -252,19 +601,20 @@ def clean_dataset_name(name: str) -> str:
     name = str(name).strip()
     
     # Replace spaces and common separators with underscores
-    name = re.sub(r'[\s\-\.]+', '_', name)
+    name = _SEPARATORS_RE.sub('_', name)
     
     # Remove all non-alphanumeric characters except underscores
-    name = re.sub(r'[^a-zA-Z0-9_]', '', name)
+    name = _NON_IDENTIFIER_RE.sub('', name)
     
     # Remove multiple consecutive underscores
-    name = re.sub(r'_+', '_', name)
+    name = _UNDERSCORES_RE.sub('_', name)
     
     # Remove leading/trailing underscores
     name = name.strip('_')
     
-    # Ensure it starts with a letter or underscore (Python identifier rule)
-    if name and not re.match(r'^[a-zA-Z_]', name):
+    # Ensure it starts with a letter or underscore (Python identifier rule); only
+    # [a-zA-Z0-9_] remain here, so the C-level isidentifier() check is equivalent
+    if name and not name.isidentifier():
         name = f"dataset_{name}"
     
     # If empty after cleaning, use default
@@ -276,7 +626,7 @@ def clean_dataset_name(name: str) -> str:
         name = name[:30]
     
     # Ensure it's still a valid identifier after truncation
-    if not re.match(r'^[a-zA-Z_]', name):
+    if not name.isidentifier():
         name = f"dataset_{name}"
     
 
@@ -285,6 +635,7 @@ def clean_dataset_name(name: str) -> str:
 @router.post("/upload_dataframe")
 async def upload_dataframe(
     file: UploadFile = File(...),
+    path: str = Depends(spooled_upload_path),
     name: str = Form(...),
     description: str = Form(...),
     columns:List[str] = Form(...),
@@ -295,28 +646,30 @@ async def upload_dataframe(
     request: Request = None
 ):
     try:
-        logger.log_message(f"CSV upload: fill_nulls={fill_nulls}, convert_types={convert_types}", level=logging.INFO)
-        
-        # Log the incoming request details
-        logger.log_message(f"Upload request for session {session_id}: name='{name}', description='{description}'", level=logging.INFO)
+        if logger.is_enabled_for(logging.INFO):
+            logger.log_message(f"CSV upload: fill_nulls={fill_nulls}, convert_types={convert_types}", level=logging.INFO)
+            # Log the incoming request details
+            logger.log_message(f"Upload request for session {session_id}: name='{name}', description='{description}'", level=logging.INFO)
         
         # Check if we need to force a complete session reset before upload
         force_refresh = request.headers.get("X-Force-Refresh") == "true" if request else False
         
         # Log session state BEFORE any changes
-        session_state_before = app_state.get_session_state(session_id)
-        datasets_before = session_state_before.get("datasets", {})
-        logger.log_message(f"Session state BEFORE upload - datasets: {list(datasets_before.keys())}", level=logging.INFO)
+        # get_session_state also creates the session and applies the app model config, so it always runs
+        datasets_before = app_state.get_session_state(session_id).get("datasets", {})
+        if logger.is_enabled_for(logging.INFO):
+            logger.log_message(f"Session state BEFORE upload - datasets: {list(datasets_before)}", level=logging.INFO)
         
         if force_refresh:
-            logger.log_message(f"Force refresh requested for session {session_id} before CSV upload", level=logging.INFO)
+            if logger.is_enabled_for(logging.INFO):
+                logger.log_message(f"Force refresh requested for session {session_id} before CSV upload", level=logging.INFO)
             # Reset the session but don't completely wipe it, so we maintain user association
             app_state.reset_session_to_default(session_id)
             
             # Log session state AFTER reset
-            session_state_after_reset = app_state.get_session_state(session_id)
-            datasets_after_reset = session_state_after_reset.get("datasets", {})
-            logger.log_message(f"Session state AFTER reset - datasets: {list(datasets_after_reset.keys())}", level=logging.INFO)
+            datasets_after_reset = app_state.get_session_state(session_id).get("datasets", {})
+            if logger.is_enabled_for(logging.INFO):
+                logger.log_message(f"Session state AFTER reset - datasets: {list(datasets_after_reset)}", level=logging.INFO)
         
         # Clean and validate the name
         name = clean_dataset_name(name)
@@ -328,66 +681,28 @@ async def upload_dataframe(
         # Ensure it's a safe Python identifier
 
         
-        # Read and process the CSV file
-        content = await file.read()
+        # Read and process the CSV file (spooled to disk by the dependency; only the head is loaded here)
+        with open(path, 'rb') as f:
+            head = f.read(65536)
         new_df = None
         last_exception = None
         
-        # Try encodings with delimiter auto-detection (with chardet first)
-        encodings_to_try =  [
-            'utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'ascii',
-            'iso-8859-1', 'iso-8859-2', 'iso-8859-3', 'iso-8859-4', 'iso-8859-5',
-            'iso-8859-6', 'iso-8859-7', 'iso-8859-8', 'iso-8859-9', 'iso-8859-15',
-            'cp1250', 'cp1251', 'cp1254', 'cp1255', 'cp1256', 'cp1257',
-            'cp932', 'shift_jis', 'euc-jp', 'euc-kr',
-            'gb2312', 'gbk', 'gb18030', 'big5', 'mac-roman',
-            'koi8-r', 'koi8-u'
-        ]
-        
+        # BOM, then UTF-8, then charset detection picks the codec once from the head, so the file is usually
+        # parsed once. The full read decodes strictly; if the sniffed codec fails further in (e.g. a cp1252 file
+        # with an ASCII head), latin-1, which decodes any byte sequence, is tried instead of corrupting text
+        encoding = await run_in_threadpool(sniff_encoding, head)
+        encodings_to_try = [encoding] if encoding == 'latin-1' else [encoding, 'latin-1']
         
-        # Try to detect encoding using chardet if available
-        if HAS_CHARDET:
-            try:
-                detected = chardet.detect(content[:100000])
-                if detected and detected.get('encoding') and detected.get('confidence', 0) > 0.7:
-                    detected_encoding = detected['encoding']
-                    if detected_encoding not in encodings_to_try:
-                        encodings_to_try.insert(0, detected_encoding)
-                    logger.log_message(f"Detected encoding: {detected_encoding} (confidence: {detected['confidence']:.2f})", level=logging.INFO)
-            except Exception:
-                pass
-        
-        delimiters_to_try = [',', ';', '\t', '|', ':', ' ']
-
         for encoding in encodings_to_try:
             try:
-                csv_content = content.decode(encoding)
-                sample = csv_content[:1024]
-                try:
-                    import csv as _csv
-                    dialect = _csv.Sniffer().sniff(sample, delimiters=delimiters_to_try)
-                    delimiter = dialect.delimiter
-                    new_df = pd.read_csv(io.StringIO(csv_content), sep=delimiter, engine='python')[columns]
-                except Exception:
-                    # Fallback to pandas automatic detection
-                    try:
-                        new_df = pd.read_csv(io.StringIO(csv_content), sep=None, engine='python')[columns]
-                    except Exception:
-                        # Final fallback: brute-force common delimiters
-                        for d in delimiters_to_try:
-                            try:
-                                new_df = pd.read_csv(io.StringIO(csv_content), sep=d, engine='python')[columns]
-                                break
-                            except Exception:
-                                new_df = None
-                if new_df is not None:
-                    new_df.replace({np.nan: None, np.inf: None, -np.inf: None}, inplace=True)
+                # Parsing runs in the threadpool so the event loop keeps serving other requests
+                new_df = await run_in_threadpool(read_csv_upload, path, encoding, columns)
+                if logger.is_enabled_for(logging.INFO):
                     logger.log_message(f"Successfully read CSV with encoding: {encoding}", level=logging.INFO)
-                    break
+                break
             except Exception as e:
+                new_df = None
                 last_exception = e
-                logger.log_message(f"Failed to read CSV with encoding {encoding}: {str(e)}", level=logging.WARNING)
-                continue
         
         if new_df is None:
             raise HTTPException(status_code=400, detail=f"Error reading file with tried encodings: {encodings_to_try}. Last error: {str(last_exception)}")
@@ -399,22 +714,26 @@ async def upload_dataframe(
         datasets = {name: new_df}
         
         # Update the session with the new dataset (this will replace any existing datasets) but not update desc, as that is passed already
-        app_state.update_session_dataset(session_id, datasets, [name], desc, pre_generated=True)
+        await run_in_threadpool(app_state.update_session_dataset, session_id, datasets, [name], desc, pre_generated=True)
         
         # Log session state AFTER upload
-        session_state_after_upload = app_state.get_session_state(session_id)
-        datasets_after_upload = session_state_after_upload.get("datasets", {})
-        logger.log_message(f"Session state AFTER upload - datasets: {list(datasets_after_upload.keys())}", level=logging.INFO)
+        datasets_after_upload = app_state.get_session_state(session_id).get("datasets", {})
+        if logger.is_enabled_for(logging.INFO):
+            logger.log_message(f"Session state AFTER upload - datasets: {list(datasets_after_upload)}", level=logging.INFO)
         
-        logger.log_message(f"Successfully uploaded dataset '{name}' for session {session_id}", level=logging.INFO)
+        if logger.is_enabled_for(logging.INFO):
+            logger.log_message(f"Successfully uploaded dataset '{name}' for session {session_id}", level=logging.INFO)
         
-        return JSONResponse(content=sanitize_json({
+        return ORJSONResponse(content={
             "message": "Dataframe uploaded successfully",
             "session_id": session_id,
             "rows": int(new_df.shape[0]),
             "columns": int(new_df.shape[1])
-        }))
+        })
         
+    except HTTPException as e:
+        logger.log_message(f"Error in upload_dataframe: {e.detail}", level=logging.ERROR)
+        raise
     except Exception as e:
         logger.log_message(f"Error in upload_dataframe: {str(e)}", level=logging.ERROR)
         raise HTTPException(status_code=400, detail=str(e))
@@ -428,33 +747,25 @@ async def update_model_settings(
     try:
         # If no API key provided, use default
         if not settings.api_key:
-            if settings.provider.lower() == "groq":
-                settings.api_key = os.getenv("GROQ_API_KEY")
-            elif settings.provider.lower() == "openai":
-                settings.api_key = os.getenv("OPENAI_API_KEY")
-            elif settings.provider.lower() == "anthropic":
-                settings.api_key = os.getenv("ANTHROPIC_API_KEY")
-            elif settings.provider.lower() == "gemini":
-                settings.api_key = os.getenv("GEMINI_API_KEY")
+            from src.utils.model_registry import PROVIDER_KEY_ENV
+            key_env = PROVIDER_KEY_ENV.get(settings.provider.lower())
+            if key_env:
+                settings.api_key = os.getenv(key_env)
         
         # Get session state to update model config
         session_state = app_state.get_session_state(session_id)
 
-        # Apply model-specific safeguards (temperature + max_tokens)
-        safe_params = apply_model_safeguards(
-            model_name=settings.model,
-            provider=settings.provider,
-            temperature=settings.temperature,
-            max_tokens=settings.max_tokens
-        )
-
-        # Create the model config with safe parameters
+        # Create the model config with model-specific safeguards (temperature + max_tokens) applied
         model_config = {
             "provider": settings.provider,
             "model": settings.model,
             "api_key": settings.api_key,
-            "temperature": safe_params["temperature"],
-            "max_tokens": safe_params["max_tokens"]
+            **apply_model_safeguards(
+                model_name=settings.model,
+                provider=settings.provider,
+                temperature=settings.temperature,
+                max_tokens=settings.max_tokens
+            )
         }
 
         
@@ -471,6 +782,7 @@ async def update_model_settings(
         app_state._session_manager._app_model_config = model_config
 
         # Create the LM instance to test the configuration, but don't set it globally
+        from src.utils.model_registry import MODEL_OBJECTS
         lm = MODEL_OBJECTS[str(settings.model)]
         
 
@@ -540,11 +852,10 @@ async def get_default_dataset(
     # Get the session state to ensure we're using the default dataset
     session_state = app_state.get_session_state(session_id)
     datasets = session_state["datasets"]
-    keys = list(datasets.keys())
-    if "df" in keys:
-        df = datasets['df']
-    else:
-        df = pd.read_csv('Housing.csv')
+    df = datasets.get('df')
+    if df is None:
+        # Fall back to the frame the session manager loaded once at startup
+        df = app_state._session_manager._default_df
 
     # Load Housing.csv from the data directory (relative to backend root)
  
@@ -635,19 +946,28 @@ async def get_default_dataset(
   "usage_notes": "When analyzing this dataset, consider the impact of missing values on your analysis. Use appropriate imputation methods to maintain data integrity. Additionally, explore correlations between property features and prices to identify trends in the housing market."
 }"""
     
-    # Full JSON-safe cleanup (same as CSV preview)
-    df = df.replace([np.inf, -np.inf], None)         # Infs → null
-    df = df.where(pd.notna(df), None)                # NaN → null
-    df = df.dropna(how="all")                        # Drop fully-empty rows
-    df = df.applymap(lambda x: None if isinstance(x, str) and x.strip() == "" else x)
+    # Only the preview window is sanitized; a few extra rows are taken so dropping blank rows still fills it
+    head = df.iloc[:PREVIEW_PARSE_ROWS]
+
+    # JSON-safe cleanup in a single object pass (the cached default dataset is never modified):
+    # NaN, ±Inf and blank strings become null, numpy/datetime values become JSON types,
+    # and fully-empty rows are dropped
+    rows = []
+    for row in head.to_numpy(dtype=object):
+        cells = [to_json_safe(val) for val in row]
+        cells = [None if isinstance(val, float) and not np.isfinite(val) else val for val in cells]
+        if any(val is not None for val in cells):
+            rows.append(cells)
+            if len(rows) == PREVIEW_ROWS:
+                break
 
     preview_data = {
-        "headers": df.columns.tolist(),
-        "rows": df.head(10).applymap(to_serializable).values.tolist(),
+        "headers": head.columns.tolist(),
+        "rows": rows,
         "name": "Housing Dataset",
         "description": desc
     }
-    return JSONResponse(content=sanitize_json(preview_data))
+    return ORJSONResponse(preview_data)
     # except Exception as e:
     #     raise HTTPException(status_code=400, detail=str(e))
 
@@ -703,8 +1023,10 @@ async def reset_session(
 
                 raise HTTPException(status_code=500, detail="Session datasets are not valid DataFrames")
             
-            # Update the session dataset with the new description
-            app_state.update_session_dataset(session_id, datasets, names, desc)
+            # Update the session dataset with the new description (generated without blocking the event loop)
+            from src.utils.dataset_description_generator import agenerate_dataset_description
+            desc = await agenerate_dataset_description(datasets, desc, names)
+            await run_in_threadpool(app_state.update_session_dataset, session_id, datasets, names, desc, pre_generated=True)
         
         return {
             "message": "Session reset to default dataset",
@@ -739,8 +1061,12 @@ async def generate_description_from_preview(
         if not headers or not rows:
             raise HTTPException(status_code=400, detail="Headers and rows are required")
 
-        # Convert rows to DataFrame
-        df = pd.DataFrame(rows, columns=headers)
+        # Pad short rows (client JSON can be ragged) so they fill with nulls as the list-of-lists constructor did
+        width = len(headers)
+        rows = [row if len(row) >= width else list(row) + [None] * (width - len(row)) for row in rows]
+
+        # Convert rows to DataFrame via a C-ordered object array so rows stay contiguous
+        df = pd.DataFrame(np.asarray(rows, dtype=object, order='C'), columns=headers, copy=False)
         
         # Infer data types from the sample data
         for col in df.columns:
@@ -762,28 +1088,18 @@ async def generate_description_from_preview(
                     # Keep as string
                     df[col] = df[col].astype(str)
         
-        # Build dataset view for description generation
-        dataset_view = ""
-        head_data = df.head(3)
-        columns = [{col: str(head_data[col].dtype)} for col in head_data.columns]
-        dataset_view += f"exact_table_name={dataset_name}\n:columns:{str(columns)}\n{head_data.to_markdown()}\n"
-        
-        # Generate description using AI
-        with dspy.context(lm=mid_lm):
-            data_context = dspy.Predict(dataset_description_agent)(
-                existing_description=user_description,
-                dataset=dataset_view
-            )
-            generated_desc = data_context.description
+        # Same view, predictor and cache as upload-time descriptions (heavy LM imports are deferred to first use);
+        # the LM call blocks, so it runs in the threadpool instead of stalling the event loop
+        from src.utils.dataset_description_generator import generate_description_text
+        generated_desc = await run_in_threadpool(generate_description_text, {dataset_name: df}, user_description)
         
         # Clean the generated description to ensure it's valid JSON if it's JSON
         try:
             # Try to parse as JSON to validate it
-            import json
-            parsed_desc = json.loads(generated_desc)
+            parsed_desc = orjson.loads(generated_desc)
             # If it's valid JSON, format it properly
-            cleaned_desc = json.dumps(parsed_desc, indent=2)
-        except json.JSONDecodeError:
+            cleaned_desc = orjson.dumps(parsed_desc, option=orjson.OPT_INDENT_2).decode()
+        except orjson.JSONDecodeError:
             # If it's not JSON, use as-is but clean any problematic characters
             cleaned_desc = generated_desc.replace('\\r\\n', '\n').replace('\\n', '\n').replace("\\'", "'")
         
@@ -814,22 +1130,8 @@ async def get_session_info(
         current_description = session_state.get("description", "")
         default_name = getattr(session_manager, "_default_name", "Housing Dataset")
         
-        # More robust detection of custom dataset
-        is_custom = False
-        
-        # Check by name
-        if current_name and current_name != default_name:
-            is_custom = True
-                    
-        # Also check by checking if we have a dataframe that's different from default
-        if "datasets" in session_state and session_state["datasets"] is not None:
-            try:
-                # This is just a basic check - we could make it more sophisticated if needed
-                key_count = len(session_state["datasets"].keys)
-                if key_count > 1:
-                    is_custom = True
-            except Exception as e:
-                logger.log_message(f"Error comparing datasets: {str(e)}", level=logging.ERROR)
+        # Custom dataset flag is maintained by update_session_dataset / reset_session_to_default
+        is_custom = session_state.get("is_custom_dataset", False)
         
         # Return session information
         response_data = {
@@ -922,87 +1224,43 @@ def to_serializable(val):
         return val.isoformat()
     return val
 
-def sanitize_json(obj):
-    import math
-    if isinstance(obj, float):
-        return None if (math.isnan(obj) or math.isinf(obj)) else obj
-    if isinstance(obj, dict):
-        return {k: sanitize_json(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [sanitize_json(i) for i in obj]
-    return obj
+def to_json_safe(val):
+    """Preview cell cleanup in one step: NaN and blank strings → None, numpy/datetime → JSON types (Inf is left to orjson)"""
+    if isinstance(val, str):
+        return val if val.strip() else None
+    return to_serializable(val)
 
 
 @router.post("/preview-csv-upload")
 async def preview_csv_upload(
+    request: Request,
     file: UploadFile = File(...),
 ):
     """Preview CSV file without modifying session"""
     try:
-        content = await file.read()
-        
-        # Try encodings with delimiter auto-detection (with chardet first)
-        encodings_to_try = [
-            'utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'ascii',
-            'iso-8859-1', 'iso-8859-2', 'iso-8859-3', 'iso-8859-4', 'iso-8859-5',
-            'iso-8859-6', 'iso-8859-7', 'iso-8859-8', 'iso-8859-9', 'iso-8859-15',
-            'cp1250', 'cp1251', 'cp1254', 'cp1255', 'cp1256', 'cp1257',
-            'cp932', 'shift_jis', 'euc-jp', 'euc-kr',
-            'gb2312', 'gbk', 'gb18030', 'big5', 'mac-roman',
-            'koi8-r', 'koi8-u'
-        ]
-        
-        
-        # Try to detect encoding using chardet if available
-        if HAS_CHARDET:
-            try:
-                detected = chardet.detect(content[:100000])
-                if detected and detected.get('encoding') and detected.get('confidence', 0) > 0.7:
-                    detected_encoding = detected['encoding']
-                    if detected_encoding not in encodings_to_try:
-                        encodings_to_try.insert(0, detected_encoding)
-                    logger.log_message(f"Preview detected encoding: {detected_encoding} (confidence: {detected['confidence']:.2f})", level=logging.INFO)
-            except Exception:
-                pass
-        
-        delimiters_to_try = [',', ';', '\t', '|', ':', ' ']
-        new_df = None
-        last_exception = None
-
-        for encoding in encodings_to_try:
-            try:
-                csv_content = content.decode(encoding)
-                sample = csv_content[:4096]
-                try:
-                    import csv as _csv
-                    dialect = _csv.Sniffer().sniff(sample, delimiters=delimiters_to_try)
-                    delimiter = dialect.delimiter
-                    new_df = pd.read_csv(io.StringIO(csv_content), sep=delimiter, engine='python')
-                except Exception:
-                    # Fallback to pandas automatic detection
-                    try:
-                        new_df = pd.read_csv(io.StringIO(csv_content), sep=None, engine='python')
-                    except Exception:
-                        # Final fallback: brute-force common delimiters
-                        for d in delimiters_to_try:
-                            try:
-                                new_df = pd.read_csv(io.StringIO(csv_content), sep=d, engine='python')
-                                break
-                            except Exception:
-                                new_df = None
-                if new_df is not None:
-                    logger.log_message(f"Successfully read CSV preview with encoding: {encoding}", level=logging.INFO)
-                    break
-            except Exception as e:
-                last_exception = e
-                logger.log_message(f"Failed to read CSV preview with encoding {encoding}: {str(e)}", level=logging.WARNING)
-                continue
-        
-        if new_df is None:
-            raise HTTPException(status_code=400, detail=f"Error reading file with tried encodings: {encodings_to_try}. Last error: {str(last_exception)}")
+        # Only the first rows are shown, so only the start of the upload is read
+        content, truncated = await read_upload_prefix(file)
+        
+        # The preview depends only on these bytes and the filename, so it can be revalidated by ETag
+        etag = f'"{hashlib.sha256(content + (file.filename or "").encode()).hexdigest()[:16]}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=cache_headers)
+        
+        # Pick the codec once (BOM, then UTF-8, then charset detection) and parse only the preview window;
+        # charset detection is CPU-bound, so it runs in the threadpool like the parse
+        encoding = await run_in_threadpool(sniff_encoding, content)
+        if truncated:
+            content = trim_partial_line(content, encoding)
+        try:
+            headers, raw_rows = await run_in_threadpool(read_csv_preview, content, encoding)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error reading file with encoding {encoding}: {str(e)}")
+        if logger.is_enabled_for(logging.INFO):
+            logger.log_message(f"Successfully read CSV preview with encoding: {encoding}", level=logging.INFO)
         
         # Clean and validate the name
-        name = file.filename.replace('.csv', '').replace(' ', '_').lower().strip()
+        name = _CSV_SUFFIX_RE.sub('', file.filename).translate(_FILENAME_TRANS).lower().strip()
         
         # Validate name length and create safe variable name
         name = clean_dataset_name(name)
@@ -1018,29 +1276,27 @@ async def preview_csv_upload(
         
         # Update the session with the new dataset (this will replace any existing datasets)
         
-        logger.log_message(f"Successfully previewed dataset '{name}'", level=logging.INFO)
-        
-        # Inline this in your CSV preview endpoint right before returning JSONResponse
-
-        # df is your DataFrame built from the uploaded CSV
-
-        # JSON-safe cleanup (no separate helper)
-        new_df = new_df.replace([np.inf, -np.inf], None)         # Infs → null
-        new_df = new_df.where(pd.notna(new_df), None)            # NaN → null
-        new_df = new_df.dropna(how="all")                        # Drop fully-empty rows
-        new_df = new_df.applymap(lambda x: None if isinstance(x, str) and x.strip() == "" else x)
-
-        preview_rows = new_df.head(10).applymap(to_serializable).values.tolist()
-
+        if logger.is_enabled_for(logging.INFO):
+            logger.log_message(f"Successfully previewed dataset '{name}'", level=logging.INFO)
+        
+        # JSON-safe cleanup in a single pass over the parsed rows (NaN/blank → null; orjson writes Inf as null),
+        # skipping fully-empty rows and stopping once the preview is full
+        preview_rows = []
+        for row in raw_rows:
+            cleaned = [to_json_safe(val) for val in row]
+            if any(val is not None for val in cleaned):
+                preview_rows.append(cleaned)
+                if len(preview_rows) == PREVIEW_ROWS:
+                    break
 
         # Limit preview rows
         payload = {
-            "headers": new_df.columns.tolist(),
+            "headers": headers,
             "rows": preview_rows,
             "name": name,
             "description": desc
         }
-        return JSONResponse(content=sanitize_json(payload))
+        return ORJSONResponse(payload, headers=cache_headers)
         
     except Exception as e:
         logger.log_message(f"Error in preview_csv_upload: {str(e)}", level=logging.ERROR)
@@ -1050,7 +1306,8 @@ async def preview_csv_upload(
 async def generate_session():
     """Generate a new session ID and initialize it with default dataset"""
     try:
-        import uuid
+        # Keep the canonical UUID form: the frontend validates backend session IDs against it.
+        # uuid4() is already a single os.urandom(16) call, so secrets.token_hex would not be cheaper
         session_id = str(uuid.uuid4())
         
         # Initialize the session with default dataset
@@ -1,16 +1,121 @@
+import hashlib
 import logging
+import os
 import pandas as pd
 from typing import Dict
 
 from src.agents.agents import dataset_description_agent, data_context_gen
 from src.utils.model_registry import mid_lm
-from src.utils.logger import Logger
+from src.utils.logger import get_logger
 import dspy
 
+# diskcache (installed with dspy) persists generated descriptions across workers and restarts
+try:
+    import diskcache
+    HAS_DISKCACHE = True
+except ImportError:
+    HAS_DISKCACHE = False
+
 # Initialize logger
-logger = Logger("dataset_description_generator", see_time=False, console_log=False)
+logger = get_logger("dataset_description_generator")
+
+# Generated descriptions keyed by a hash of the LM inputs; set DESC_CACHE_DISABLED=1 to always regenerate
+DESC_CACHE_TTL = 7 * 24 * 3600
+_desc_cache = None
+if HAS_DISKCACHE and not os.getenv("DESC_CACHE_DISABLED"):
+    try:
+        _desc_cache = diskcache.Cache(os.getenv("DESC_CACHE_DIR", "./cache/desc"))
+    except Exception as e:
+        logger.log_message(f"Description cache unavailable, descriptions will not be cached: {str(e)}", level=logging.WARNING)
+
+# A user description at least this long that already names every table is used as-is, without an LM call
+RICH_DESCRIPTION_MIN_CHARS = 400
+
+# Predictors are built once; Predict objects are safe to call concurrently for inference
+_PREDICT_SINGLE = dspy.Predict(dataset_description_agent)
+_PREDICT_MULTI = dspy.Predict(data_context_gen)
+
+# Longest text cell shown to the LM in the dataset preview
+MAX_PREVIEW_CELL_CHARS = 80
+
+
+def _clip_cell(value):
+    return value[:MAX_PREVIEW_CELL_CHARS] if isinstance(value, str) else value
+
+
+def _build_dataset_view(datasets: Dict[str, pd.DataFrame]) -> str:
+    """Build the per-table schema and head preview the description LM reads"""
+    parts = []
+    for table_name, table_df in datasets.items():
+        head_data = table_df.iloc[:3]
+        # One vectorized dtype -> str conversion instead of a per-column lookup
+        columns = head_data.dtypes.astype(str).to_dict()
+        # Long text cells are clipped, and a tab-separated head is as readable to the LM as a markdown
+        # table with far fewer tokens
+        head_data = head_data.apply(
+            lambda col: col.map(_clip_cell) if col.dtype == object or pd.api.types.is_string_dtype(col) else col
+        )
+        snippet = head_data.to_csv(index=False, sep='\t', lineterminator='\n')
+        parts.append(f"exact_table_name={table_name}\n:columns:{columns}\n{snippet}\n")
+    return "".join(parts)
+
+
+def _description_cache_key(dataset_view: str, existing_description: str) -> str:
+    """Content hash of everything the LM sees: table names, dtypes, head rows and the user's description"""
+    return hashlib.blake2b(f"{existing_description}\0{dataset_view}".encode(), digest_size=16).hexdigest()
+
+
+def _format_description(generated_desc: str, datasets: Dict[str, pd.DataFrame], dataset_names: list = None) -> str:
+    """Prefix the generated description with the exact_python_name(s) of the datasets"""
+    # Fallback to the dataset keys if no dataset names provided
+    names = dataset_names if dataset_names else list(datasets.keys())
+    if len(names) == 1:
+        # Single dataset format
+        return f" exact_python_name: `{names[0]}` Dataset: {generated_desc}"
+    # Multiple datasets format - list all dataset names
+    names_list = ", ".join([f"`{name}`" for name in names])
+    return f" exact_python_name: {names_list} Dataset: {generated_desc}"
+
 
-def generate_dataset_description(datasets: Dict[str, pd.DataFrame], existing_description: str = "", dataset_names: list = None) -> str:
+def _is_rich_description(existing_description: str, datasets: Dict[str, pd.DataFrame], dataset_names: list = None) -> bool:
+    """Whether the description is already formatted and detailed enough to skip generation"""
+    if not existing_description or len(existing_description) <= RICH_DESCRIPTION_MIN_CHARS:
+        return False
+    if "exact_python_name" not in existing_description:
+        return False
+    names = dataset_names if dataset_names else list(datasets.keys())
+    return all(f"`{name}`" in existing_description for name in names)
+
+
+def generate_description_text(datasets: Dict[str, pd.DataFrame], existing_description: str = "") -> str:
+    """
+    Run the description LM over the datasets' schema and head rows and return its raw text, without the
+    exact_python_name prefix. Unchanged datasets and description (e.g. a re-upload) reuse the cached result.
+    """
+    dataset_view = _build_dataset_view(datasets)
+    
+    cache_key = _description_cache_key(dataset_view, existing_description)
+    generated_desc = _desc_cache.get(cache_key) if _desc_cache is not None else None
+    if generated_desc is not None:
+        return generated_desc
+    
+    with dspy.context(lm=mid_lm):
+        if len(datasets) == 1:
+            generated_desc = _PREDICT_SINGLE(
+                existing_description=existing_description,
+                dataset=dataset_view
+            ).description
+        else:
+            generated_desc = _PREDICT_MULTI(
+                user_description=existing_description,
+                dataset_view=dataset_view
+            ).data_context
+    if _desc_cache is not None:
+        _desc_cache.set(cache_key, generated_desc, expire=DESC_CACHE_TTL)
+    return generated_desc
+
+
+def generate_dataset_description(datasets: Dict[str, pd.DataFrame], existing_description: str = "", dataset_names: list = None, force: bool = False) -> str:
     """
     Generate AI-powered description for datasets
     
@@ -18,6 +123,7 @@ def generate_dataset_description(datasets: Dict[str, pd.DataFrame], existing_des
         datasets: Dictionary of dataset names to DataFrames
         existing_description: Existing description to improve upon (optional)
         dataset_names: List of dataset names to use in the description format (optional)
+        force: Regenerate even if existing_description is already detailed (optional)
         
     Returns:
         Generated description string with proper exact_python_name formatting
@@ -26,54 +132,26 @@ def generate_dataset_description(datasets: Dict[str, pd.DataFrame], existing_des
         if not datasets or len(datasets) == 0:
             return existing_description
         
-        # Build dataset view for description generation
-        dataset_view = ""
-        count = 0
-        for table_name, table_df in datasets.items():
-            head_data = table_df.head(3)
-            columns = [{col: str(head_data[col].dtype)} for col in head_data.columns]
-            dataset_view += f"exact_table_name={table_name}\n:columns:{str(columns)}\n{head_data.to_markdown()}\n"
-            count += 1
-        
-        # Generate description using AI
-        with dspy.context(lm=mid_lm):
-            if count == 1:
-                data_context = dspy.Predict(dataset_description_agent)(
-                    existing_description=existing_description,
-                    dataset=dataset_view
-                )
-                generated_desc = data_context.description
-            elif count > 1:
-                data_context = dspy.Predict(data_context_gen)(
-                    user_description=existing_description,
-                    dataset_view=dataset_view
-                )
-                generated_desc = data_context.data_context
-            else:
-                generated_desc = existing_description
+        if not force and _is_rich_description(existing_description, datasets, dataset_names):
+            logger.log_message("Existing description is already detailed, skipping generation", level=logging.DEBUG)
+            return existing_description
         
-        # Format the description with exact_python_name for all datasets
-        if dataset_names and len(dataset_names) > 0:
-            if len(dataset_names) == 1:
-                # Single dataset format
-                formatted_desc = f" exact_python_name: `{dataset_names[0]}` Dataset: {generated_desc}"
-            else:
-                # Multiple datasets format - list all dataset names
-                names_list = ", ".join([f"`{name}`" for name in dataset_names])
-                formatted_desc = f" exact_python_name: {names_list} Dataset: {generated_desc}"
-        else:
-            # Fallback to original format if no dataset names provided
-            dataset_keys = list(datasets.keys())
-            if len(dataset_keys) == 1:
-                formatted_desc = f" exact_python_name: `{dataset_keys[0]}` Dataset: {generated_desc}"
-            else:
-                names_list = ", ".join([f"`{name}`" for name in dataset_keys])
-                formatted_desc = f" exact_python_name: {names_list} Dataset: {generated_desc}"
+        generated_desc = generate_description_text(datasets, existing_description)
         
-        logger.log_message(f"Successfully generated dataset description for {count} dataset(s)", level=logging.INFO)
+        formatted_desc = _format_description(generated_desc, datasets, dataset_names)
+        logger.log_message(f"Successfully generated dataset description for {len(datasets)} dataset(s)", level=logging.INFO)
         return formatted_desc
         
     except Exception as e:
         logger.log_message(f"Failed to generate dataset description: {str(e)}", level=logging.WARNING)
         # Return existing description if generation fails
         return existing_description
+
+
+async def agenerate_dataset_description(datasets: Dict[str, pd.DataFrame], existing_description: str = "", dataset_names: list = None, force: bool = False) -> str:
+    """
+    Async variant of generate_dataset_description for use from request handlers.
+    The whole generation (view, cache and LM call) runs in a dspy.asyncify worker thread, so it does
+    not block the event loop and several descriptions can be generated concurrently with asyncio.gather.
+    """
+    return await dspy.asyncify(generate_dataset_description)(datasets, existing_description, dataset_names, force)
@@ -1,31 +1,89 @@
+import atexit
+import functools
 import os
+import queue
 import time
 import logging
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from dotenv import load_dotenv
 
 load_dotenv()
 
+IS_DEV = os.getenv("ENVIRONMENT", "development") == "development"
+
+# Created once per process instead of on every Logger construction
+if IS_DEV:
+    os.makedirs("./logs", exist_ok=True)
+
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# File writes happen on one listener thread; request threads only enqueue records
+_log_queue = queue.Queue(-1)
+
+
+class _FileQueueHandler(QueueHandler):
+    """Enqueues records tagged with the file handler of the logger this handler is attached to"""
+
+    def __init__(self, file_handler: logging.Handler):
+        super().__init__(_log_queue)
+        self.file_handler = file_handler
+
+    def prepare(self, record):
+        # prepare() returns a copy, so a record propagated to several loggers gets one tag per file
+        record = super().prepare(record)
+        record.file_handler = self.file_handler
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """Hands each queued record to the file handler of the logger whose queue handler enqueued it"""
+
+    def emit(self, record):
+        handler = getattr(record, "file_handler", None)
+        if handler is not None:
+            handler.handle(record)
+
+
+_log_listener = None
+if IS_DEV:
+    _log_listener = QueueListener(_log_queue, _FileRouter())
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
 class Logger:
     def __init__(self, name: str, see_time: bool = False, console_log: bool = False, level: int = logging.INFO):
-        self.is_dev = os.getenv("ENVIRONMENT", "development") == "development"
+        self.is_dev = IS_DEV
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
 
         if not self.is_dev:
-            self.logger.addHandler(logging.NullHandler())
+            # Outside development logging is off; bind a no-op so log calls skip the method body entirely
+            self.log_message = lambda message, level=logging.INFO: None
+
+        # logging.getLogger returns the same logger per name; only attach handlers once
+        if self.logger.handlers:
             return
 
-        os.makedirs("./logs", exist_ok=True)
+        if not self.is_dev:
+            self.logger.addHandler(logging.NullHandler())
+            return
 
         formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s" if see_time else "%(message)s,"
         )
 
-        # File handler with UTF-8 encoding
-        file_handler = logging.FileHandler(f"./logs/{name}.log", encoding='utf-8')
+        # Rotating UTF-8 file handler, opened on first write and fed from the queue listener
+        file_handler = RotatingFileHandler(
+            f"./logs/{name}.log",
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8',
+            delay=True,
+        )
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        self.logger.addHandler(_FileQueueHandler(file_handler))
 
         if console_log:
             # Console handler with UTF-8 encoding
@@ -37,45 +95,40 @@ class Logger:
             self.logger.addHandler(console_handler)
 
     def log_message(self, message: str, level: int = logging.INFO):
-        if not self.is_dev:
+        if not self.is_dev or not self.logger.isEnabledFor(level):
             return
-        try:
-            if level == logging.INFO:
-                self.logger.info(message)
-            elif level == logging.ERROR:
-                self.logger.error(message)
-            elif level == logging.WARNING:
-                self.logger.warning(message)
-            elif level == logging.DEBUG:
-                self.logger.debug(message)
-            else:
-                self.logger.info(message)
-        except UnicodeEncodeError:
-            # Fallback: remove emoji characters if encoding fails
-            safe_message = message.encode('ascii', 'ignore').decode('ascii')
-            if level == logging.INFO:
-                self.logger.info(safe_message)
-            elif level == logging.ERROR:
-                self.logger.error(safe_message)
-            elif level == logging.WARNING:
-                self.logger.warning(safe_message)
-            elif level == logging.DEBUG:
-                self.logger.debug(safe_message)
-            else:
-                self.logger.info(safe_message)
+        # Only enqueues (or writes to the UTF-8 console); handlers report their own encoding errors
+        self.logger.log(level, message)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether a message at this level would be emitted; lets callers skip building it"""
+        return self.is_dev and self.logger.isEnabledFor(level)
 
     def disable_logging(self):
         self.logger.disabled = True
 
 
+@functools.lru_cache(maxsize=None)
+def get_logger(name: str, see_time: bool = False, console_log: bool = False, level: int = logging.INFO) -> Logger:
+    """Shared Logger per (name, options), so modules importing the same name reuse one instance"""
+    return Logger(name, see_time=see_time, console_log=console_log, level=level)
+
+
 def log_time(func):
+    # Timing is only recorded in development; elsewhere the function is returned undecorated
+    if os.getenv("ENV", "development") != "development":
+        return func
+
+    logger = None
+
     def wrapper(*args, **kwargs):
-        if os.getenv("ENV", "development") != "development":
-            return func(*args, **kwargs)
-        start_time = time.time()
+        nonlocal logger
+        start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        logger = Logger(func.__name__ + "_time", see_time=True, level=logging.INFO)
+        end_time = time.perf_counter()
+        # Created on first timed call and reused, rather than a new Logger (and file handler) per call
+        if logger is None:
+            logger = get_logger(func.__name__ + "_time", see_time=True)
         logger.log_message(f"Function: {func.__name__}, Execution time: {round(end_time - start_time, 5)} seconds")
         return result
     return wrapper
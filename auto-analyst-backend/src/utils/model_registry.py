@@ -1,5 +1,9 @@
 import dspy
+import functools
 import os
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
 
 # Model providers
 PROVIDERS = {
@@ -8,217 +12,96 @@ PROVIDERS = {
     "groq": "GROQ",
     "gemini": "Google Gemini"
 }
+
+# Environment variable holding each provider's default API key
+PROVIDER_KEY_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "groq": "GROQ_API_KEY",
+    "gemini": "GEMINI_API_KEY"
+}
 max_tokens = int(os.getenv("MAX_TOKENS", 6000))
 
 # Clamp temperature to valid range (0..1) for all models
 default_temperature = min(1.0, max(0.0, float(os.getenv("TEMPERATURE", "1.0"))))
 
+# litellm/dspy response caching is on unless DSPY_CACHE=0
+LM_CACHE = os.getenv("DSPY_CACHE", "1") != "0"
+
+# Anthropic prompt caching: litellm marks the static system message with cache_control,
+# so repeat calls bill the agent instructions as cached input tokens
+ANTHROPIC_CACHE_CONTROL = [{"location": "message", "role": "system"}]
+
+
+@functools.lru_cache(maxsize=None)
+def _make_lm(model: str, **kwargs) -> dspy.LM:
+    """
+    Build an LM for a provider-prefixed model, keyed from that provider's PROVIDER_KEY_ENV variable;
+    identical arguments return the same instance
+    """
+    provider = model.split("/", 1)[0]
+    if provider == "anthropic":
+        kwargs["cache_control_injection_points"] = ANTHROPIC_CACHE_CONTROL
+    return dspy.LM(model=model, api_key=os.getenv(PROVIDER_KEY_ENV[provider]), cache=LM_CACHE, **kwargs)
+
+
 # Lightweight LMs used for small internal tasks (planning, classification, etc.)
-small_lm = dspy.LM('openai/gpt-5-nano', max_tokens=300, api_key=os.getenv("OPENAI_API_KEY"), cache=False)
-
-mid_lm = dspy.LM('openai/gpt-5-nano', max_tokens=1800, api_key=os.getenv("OPENAI_API_KEY"), cache=False)
-
-# OpenAI models
-gpt_5_nano = dspy.LM(
-    model="openai/gpt-5-nano",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=16_000,
-    cache=False
-)
-
-gpt_5_mini = dspy.LM(
-    model="openai/gpt-5-mini",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=16_000,
-    cache=False
-)
-
-gpt_5 = dspy.LM(
-    model="openai/gpt-5",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=16_000,
-    cache=False
-)
-
-gpt_5_2 = dspy.LM(
-    model="openai/gpt-5.2",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=float(os.getenv("TEMPERATURE", 1.0)),
-    max_tokens=None,
-    max_completion_tokens=max_tokens,
-    cache=False
-)
-
-gpt_5_2_pro = dspy.LM(
-    model="openai/gpt-5.2-pro",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=float(os.getenv("TEMPERATURE", 1.0)),
-    max_tokens=None,
-    max_completion_tokens=max_tokens,
-    cache=False
-)
-
-gpt_5_2_chat_latest = dspy.LM(
-    model="openai/gpt-5.2-chat-latest",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=float(os.getenv("TEMPERATURE", 1.0)),
-    max_tokens=None,
-    max_completion_tokens=max_tokens,
-    cache=False
-)
-
-gpt_5_4 = dspy.LM(
-    model="openai/gpt-5.4",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=16_000,
-    cache=False
-)
-
-gpt_5_4_pro = dspy.LM(
-    model="openai/gpt-5.4-pro",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=16_000,
-    cache=False
-)
-
-o3 = dspy.LM(
-    model="openai/o3-2025-04-16",
-    api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=20_000,
-    cache=False
-)
-
-# Anthropic models
-claude_haiku_4_5 = dspy.LM(
-    model="anthropic/claude-haiku-4-5-20251001",
-    api_key=os.getenv("ANTHROPIC_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-claude_sonnet_4_5 = dspy.LM(
-    model="anthropic/claude-sonnet-4-5-20250929",
-    api_key=os.getenv("ANTHROPIC_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-claude_sonnet_4_6 = dspy.LM(
-    model="anthropic/claude-sonnet-4-6",
-    api_key=os.getenv("ANTHROPIC_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-claude_opus_4_5 = dspy.LM(
-    model="anthropic/claude-opus-4-5-20251101",
-    api_key=os.getenv("ANTHROPIC_API_KEY"),
-    temperature=float(os.getenv("TEMPERATURE", 1.0)),
-    max_tokens=max_tokens,
-    cache=False
-)
-
-claude_opus_4_6 = dspy.LM(
-    model="anthropic/claude-opus-4-6",
-    api_key=os.getenv("ANTHROPIC_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-# Groq models
-deepseek_r1_distill_llama_70b = dspy.LM(
-    model="groq/deepseek-r1-distill-llama-70b",
-    api_key=os.getenv("GROQ_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-gpt_oss_120B = dspy.LM(
-    model="groq/gpt-oss-120B",
-    api_key=os.getenv("GROQ_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-gpt_oss_20B = dspy.LM(
-    model="groq/gpt-oss-20B",
-    api_key=os.getenv("GROQ_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-# Gemini models
-gemini_2_5_pro_preview_03_25 = dspy.LM(
-    model="gemini/gemini-2.5-pro-preview-03-25",
-    api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=default_temperature,
-    max_tokens=max_tokens,
-    cache=False
-)
-
-gemini_3_pro = dspy.LM(
-    model="gemini/gemini-3-pro",
-    api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=float(os.getenv("TEMPERATURE", 1.0)),
-    max_tokens=max_tokens,
-    cache=False
-)
-
-gemini_3_flash = dspy.LM(
-    model="gemini/gemini-3-flash",
-    api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=float(os.getenv("TEMPERATURE", 1.0)),
-    max_tokens=max_tokens,
-    cache=False
-)
-
-MODEL_OBJECTS = {
+small_lm = _make_lm('openai/gpt-5-nano', max_tokens=300)
+
+mid_lm = _make_lm('openai/gpt-5-nano', max_tokens=1800)
+
+# Model name -> _make_lm arguments. LMs are built on first use rather than at import, since a
+# request only ever touches one or two of them
+_MODEL_SPECS = {
     # OpenAI models
-    "gpt-5-nano": gpt_5_nano,
-    "gpt-5-mini": gpt_5_mini,
-    "gpt-5": gpt_5,
-    "gpt-5.2": gpt_5_2,
-    "gpt-5.2-pro": gpt_5_2_pro,
-    "gpt-5.2-chat-latest": gpt_5_2_chat_latest,
-    "gpt-5.4": gpt_5_4,
-    "gpt-5.4-pro": gpt_5_4_pro,
-    "o3": o3,
-    
+    "gpt-5-nano": dict(model="openai/gpt-5-nano", temperature=default_temperature, max_tokens=16_000),
+    "gpt-5-mini": dict(model="openai/gpt-5-mini", temperature=default_temperature, max_tokens=16_000),
+    "gpt-5": dict(model="openai/gpt-5", temperature=default_temperature, max_tokens=16_000),
+    "gpt-5.2": dict(model="openai/gpt-5.2", temperature=float(os.getenv("TEMPERATURE", 1.0)), max_tokens=None, max_completion_tokens=max_tokens),
+    "gpt-5.2-pro": dict(model="openai/gpt-5.2-pro", temperature=float(os.getenv("TEMPERATURE", 1.0)), max_tokens=None, max_completion_tokens=max_tokens),
+    "gpt-5.2-chat-latest": dict(model="openai/gpt-5.2-chat-latest", temperature=float(os.getenv("TEMPERATURE", 1.0)), max_tokens=None, max_completion_tokens=max_tokens),
+    "gpt-5.4": dict(model="openai/gpt-5.4", temperature=default_temperature, max_tokens=16_000),
+    "gpt-5.4-pro": dict(model="openai/gpt-5.4-pro", temperature=default_temperature, max_tokens=16_000),
+    "o3": dict(model="openai/o3-2025-04-16", temperature=default_temperature, max_tokens=20_000),
+
     # Anthropic models
-    "claude-haiku-4-5": claude_haiku_4_5,
-    "claude-sonnet-4-5-20250929": claude_sonnet_4_5,
-    "claude-sonnet-4-6": claude_sonnet_4_6,
-    "claude-opus-4-5-20251101": claude_opus_4_5,
-    "claude-opus-4-6": claude_opus_4_6,
-    
+    "claude-haiku-4-5": dict(model="anthropic/claude-haiku-4-5-20251001", temperature=default_temperature, max_tokens=max_tokens),
+    "claude-sonnet-4-5-20250929": dict(model="anthropic/claude-sonnet-4-5-20250929", temperature=default_temperature, max_tokens=max_tokens),
+    "claude-sonnet-4-6": dict(model="anthropic/claude-sonnet-4-6", temperature=default_temperature, max_tokens=max_tokens),
+    "claude-opus-4-5-20251101": dict(model="anthropic/claude-opus-4-5-20251101", temperature=float(os.getenv("TEMPERATURE", 1.0)), max_tokens=max_tokens),
+    "claude-opus-4-6": dict(model="anthropic/claude-opus-4-6", temperature=default_temperature, max_tokens=max_tokens),
+
     # Groq models
-    "deepseek-r1-distill-llama-70b": deepseek_r1_distill_llama_70b,
-    "gpt-oss-120B": gpt_oss_120B,
-    "gpt-oss-20B": gpt_oss_20B,
-    
+    "deepseek-r1-distill-llama-70b": dict(model="groq/deepseek-r1-distill-llama-70b", temperature=default_temperature, max_tokens=max_tokens),
+    "gpt-oss-120B": dict(model="groq/gpt-oss-120B", temperature=default_temperature, max_tokens=max_tokens),
+    "gpt-oss-20B": dict(model="groq/gpt-oss-20B", temperature=default_temperature, max_tokens=max_tokens),
+
     # Gemini models
-    "gemini-2.5-pro-preview-03-25": gemini_2_5_pro_preview_03_25,
-    "gemini-3-pro": gemini_3_pro,
-    "gemini-3-flash": gemini_3_flash
+    "gemini-2.5-pro-preview-03-25": dict(model="gemini/gemini-2.5-pro-preview-03-25", temperature=default_temperature, max_tokens=max_tokens),
+    "gemini-3-pro": dict(model="gemini/gemini-3-pro", temperature=float(os.getenv("TEMPERATURE", 1.0)), max_tokens=max_tokens),
+    "gemini-3-flash": dict(model="gemini/gemini-3-flash", temperature=float(os.getenv("TEMPERATURE", 1.0)), max_tokens=max_tokens),
 }
 
 
+class _LazyModelObjects(Mapping):
+    """Read-only model name -> LM mapping over _MODEL_SPECS; each LM is built on first access"""
+
+    def __getitem__(self, model_name: str):
+        return _make_lm(**_MODEL_SPECS[model_name])
+
+    def __iter__(self):
+        return iter(_MODEL_SPECS)
+
+    def __len__(self):
+        return len(_MODEL_SPECS)
+
+
+MODEL_OBJECTS = _LazyModelObjects()
+
+
 def get_model_object(model_name: str):
     """Get model object by name"""
-    return MODEL_OBJECTS.get(model_name, claude_sonnet_4_6)
+    return _make_lm(**_MODEL_SPECS.get(model_name, _MODEL_SPECS["claude-sonnet-4-6"]))
 
 
 # Get max tokens from environment
@@ -278,67 +161,104 @@ MODEL_TIERS = {
     }
 }
 
+@dataclass(frozen=True, slots=True)
+class ModelMeta:
+    display_name: str
+    context_window: int
+
+
+@dataclass(frozen=True, slots=True)
+class ModelCost:
+    """Price in USD per 1K input/output tokens, plus the per-token rates derived from it"""
+    input: float
+    output: float
+    input_per_token: float = field(init=False)
+    output_per_token: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "input_per_token", self.input / 1000.0)
+        object.__setattr__(self, "output_per_token", self.output / 1000.0)
+
+
 # Model metadata (display name, context window, etc.)
-MODEL_METADATA = {
+MODEL_METADATA = MappingProxyType({
     # OpenAI
-    "gpt-5-nano": {"display_name": "GPT-5 Nano", "context_window": 64000},
-    "gpt-5-mini": {"display_name": "GPT-5 Mini", "context_window": 150000},
-    "gpt-5": {"display_name": "GPT-5", "context_window": 400000},
-    "gpt-5.2": {"display_name": "GPT-5.2", "context_window": 400000},
-    "gpt-5.2-pro": {"display_name": "GPT-5.2 Pro", "context_window": 400000},
-    "gpt-5.2-chat-latest": {"display_name": "GPT-5.2 Chat", "context_window": 400000},
-    "gpt-5.4": {"display_name": "GPT-5.4", "context_window": 1050000},
-    "gpt-5.4-pro": {"display_name": "GPT-5.4 Pro", "context_window": 1050000},
-    "o3": {"display_name": "o3", "context_window": 128000},
+    "gpt-5-nano": ModelMeta("GPT-5 Nano", 64000),
+    "gpt-5-mini": ModelMeta("GPT-5 Mini", 150000),
+    "gpt-5": ModelMeta("GPT-5", 400000),
+    "gpt-5.2": ModelMeta("GPT-5.2", 400000),
+    "gpt-5.2-pro": ModelMeta("GPT-5.2 Pro", 400000),
+    "gpt-5.2-chat-latest": ModelMeta("GPT-5.2 Chat", 400000),
+    "gpt-5.4": ModelMeta("GPT-5.4", 1050000),
+    "gpt-5.4-pro": ModelMeta("GPT-5.4 Pro", 1050000),
+    "o3": ModelMeta("o3", 128000),
 
     # Anthropic
-    "claude-haiku-4-5": {"display_name": "Claude Haiku 4.5", "context_window": 200000},
-    "claude-sonnet-4-5-20250929": {"display_name": "Claude Sonnet 4.5", "context_window": 200000},
-    "claude-sonnet-4-6": {"display_name": "Claude Sonnet 4.6", "context_window": 1000000},
-    "claude-opus-4-5-20251101": {"display_name": "Claude Opus 4.5", "context_window": 200000},
-    "claude-opus-4-6": {"display_name": "Claude Opus 4.6", "context_window": 1000000},
+    "claude-haiku-4-5": ModelMeta("Claude Haiku 4.5", 200000),
+    "claude-sonnet-4-5-20250929": ModelMeta("Claude Sonnet 4.5", 200000),
+    "claude-sonnet-4-6": ModelMeta("Claude Sonnet 4.6", 1000000),
+    "claude-opus-4-5-20251101": ModelMeta("Claude Opus 4.5", 200000),
+    "claude-opus-4-6": ModelMeta("Claude Opus 4.6", 1000000),
 
     # GROQ
-    "deepseek-r1-distill-llama-70b": {"display_name": "DeepSeek R1 Distill Llama 70b", "context_window": 32768},
-    "gpt-oss-120B": {"display_name": "OpenAI gpt oss 120B", "context_window": 128000},
-    "gpt-oss-20B": {"display_name": "OpenAI gpt oss 20B", "context_window": 128000},
+    "deepseek-r1-distill-llama-70b": ModelMeta("DeepSeek R1 Distill Llama 70b", 32768),
+    "gpt-oss-120B": ModelMeta("OpenAI gpt oss 120B", 128000),
+    "gpt-oss-20B": ModelMeta("OpenAI gpt oss 20B", 128000),
 
     # Gemini
-    "gemini-2.5-pro-preview-03-25": {"display_name": "Gemini 2.5 Pro", "context_window": 1000000},
-    "gemini-3-pro": {"display_name": "Gemini 3 Pro", "context_window": 1000000},
-    "gemini-3-flash": {"display_name": "Gemini 3 Flash", "context_window": 1000000},
+    "gemini-2.5-pro-preview-03-25": ModelMeta("Gemini 2.5 Pro", 1000000),
+    "gemini-3-pro": ModelMeta("Gemini 3 Pro", 1000000),
+    "gemini-3-flash": ModelMeta("Gemini 3 Flash", 1000000),
+})
+
+MODEL_COSTS = MappingProxyType({
+    "openai": MappingProxyType({
+        "gpt-5-nano": ModelCost(0.00005, 0.0004),
+        "gpt-5-mini": ModelCost(0.00025, 0.002),
+        "gpt-5": ModelCost(0.00125, 0.01),
+        "gpt-5.2": ModelCost(0.00125, 0.01),
+        "gpt-5.2-pro": ModelCost(0.002, 0.015),
+        "gpt-5.2-chat-latest": ModelCost(0.0005, 0.002),
+        "gpt-5.4": ModelCost(0.0025, 0.015),
+        "gpt-5.4-pro": ModelCost(0.03, 0.18),
+        "o3": ModelCost(0.002, 0.008),
+    }),
+    "anthropic": MappingProxyType({
+        "claude-haiku-4-5": ModelCost(0.001, 0.005),
+        "claude-sonnet-4-5-20250929": ModelCost(0.003, 0.015),
+        "claude-sonnet-4-6": ModelCost(0.003, 0.015),
+        "claude-opus-4-5-20251101": ModelCost(0.015, 0.075),
+        "claude-opus-4-6": ModelCost(0.005, 0.025),
+    }),
+    "groq": MappingProxyType({
+        "deepseek-r1-distill-llama-70b": ModelCost(0.00075, 0.00099),
+        "gpt-oss-120B": ModelCost(0.00075, 0.00099),
+        "gpt-oss-20B": ModelCost(0.00075, 0.00099)
+    }),
+    "gemini": MappingProxyType({
+        "gemini-2.5-pro-preview-03-25": ModelCost(0.00015, 0.001),
+        "gemini-3-pro": ModelCost(0.0002, 0.001),
+        "gemini-3-flash": ModelCost(0.0001, 0.0005)
+    })
+})
+
+# Flat (provider, model) -> cost table so billing does a single lookup
+_MODEL_COST_TABLE = {
+    (provider, model): cost
+    for provider, models in MODEL_COSTS.items()
+    for model, cost in models.items()
 }
 
-MODEL_COSTS = {
-    "openai": {
-        "gpt-5-nano": {"input": 0.00005, "output": 0.0004},
-        "gpt-5-mini": {"input": 0.00025, "output": 0.002},
-        "gpt-5": {"input": 0.00125, "output": 0.01},
-        "gpt-5.2": {"input": 0.00125, "output": 0.01},
-        "gpt-5.2-pro": {"input": 0.002, "output": 0.015},
-        "gpt-5.2-chat-latest": {"input": 0.0005, "output": 0.002},
-        "gpt-5.4": {"input": 0.0025, "output": 0.015},
-        "gpt-5.4-pro": {"input": 0.03, "output": 0.18},
-        "o3": {"input": 0.002, "output": 0.008},
-    },
-    "anthropic": {
-        "claude-haiku-4-5": {"input": 0.001, "output": 0.005},
-        "claude-sonnet-4-5-20250929": {"input": 0.003, "output": 0.015},
-        "claude-sonnet-4-6": {"input": 0.003, "output": 0.015},
-        "claude-opus-4-5-20251101": {"input": 0.015, "output": 0.075},
-        "claude-opus-4-6": {"input": 0.005, "output": 0.025},
-    },
-    "groq": {
-        "deepseek-r1-distill-llama-70b": {"input": 0.00075, "output": 0.00099},
-        "gpt-oss-120B": {"input": 0.00075, "output": 0.00099},
-        "gpt-oss-20B": {"input": 0.00075, "output": 0.00099}
-    },
-    "gemini": {
-        "gemini-2.5-pro-preview-03-25": {"input": 0.00015, "output": 0.001},
-        "gemini-3-pro": {"input": 0.0002, "output": 0.001},
-        "gemini-3-flash": {"input": 0.0001, "output": 0.0005}
-    }
+# Reverse indexes for per-request lookups (provider keys are lowercased, as callers' names are)
+# Besides registry names, the provider-side ids in _MODEL_SPECS (e.g. "o3-2025-04-16") and dated
+# Anthropic models without their date suffix resolve to a provider; anything else is "Unknown"
+_MODEL_TO_PROVIDER = {
+    **{spec["model"].split("/", 1)[1].lower(): spec["model"].split("/", 1)[0] for spec in _MODEL_SPECS.values()},
+    "claude-sonnet-4-5": "anthropic",
+    "claude-opus-4-5": "anthropic",
+    **{model.lower(): provider for provider, models in MODEL_COSTS.items() for model in models},
 }
+_MODEL_TO_TIER = {model: tier_id for tier_id, tier_info in MODEL_TIERS.items() for model in tier_info["models"]}
 
 # Helper functions
 
@@ -347,35 +267,21 @@ def get_provider_for_model(model_name):
     if not model_name:
         return "Unknown"
         
-    model_name = model_name.lower()
-    return next((provider for provider, models in MODEL_COSTS.items() 
-                if any(model_name in model for model in models)), "Unknown")
+    return _MODEL_TO_PROVIDER.get(model_name.lower(), "Unknown")
 
 def get_model_tier(model_name):
     """Get the tier of a model"""
-    for tier_id, tier_info in MODEL_TIERS.items():
-        if model_name in tier_info["models"]:
-            return tier_id
-    return "tier1"  # Default to tier1 if not found
+    return _MODEL_TO_TIER.get(model_name, "tier1")  # Default to tier1 if not found
 
 def calculate_cost(model_name, input_tokens, output_tokens):
     """Calculate the cost for using the model based on tokens"""
     if not model_name:
         return 0
-        
-    # Convert tokens to thousands
-    input_tokens_in_thousands = input_tokens / 1000
-    output_tokens_in_thousands = output_tokens / 1000
-    
-    # Get model provider
-    model_provider = get_provider_for_model(model_name)
-    
-    # Handle case where model is not found
-    if model_provider == "Unknown" or model_name not in MODEL_COSTS.get(model_provider, {}):
+
+    cost = _MODEL_COST_TABLE.get((get_provider_for_model(model_name), model_name))
+    if cost is None:
         return 0
-        
-    return (input_tokens_in_thousands * MODEL_COSTS[model_provider][model_name]["input"] + 
-            output_tokens_in_thousands * MODEL_COSTS[model_provider][model_name]["output"])
+    return input_tokens * cost.input_per_token + output_tokens * cost.output_per_token
 
 def get_credit_cost(model_name):
     """Get the credit cost for a model"""
@@ -384,11 +290,13 @@ def get_credit_cost(model_name):
 
 def get_display_name(model_name):
     """Get the display name for a model"""
-    return MODEL_METADATA.get(model_name, {}).get("display_name", model_name)
+    meta = MODEL_METADATA.get(model_name)
+    return meta.display_name if meta is not None else model_name
 
 def get_context_window(model_name):
     """Get the context window size for a model"""
-    return MODEL_METADATA.get(model_name, {}).get("context_window", 4096)
+    meta = MODEL_METADATA.get(model_name)
+    return meta.context_window if meta is not None else 4096
 
 def get_all_models_for_provider(provider):
     """Get all models for a specific provider"""